@@ -4,6 +4,9 @@ Every medical fact references a source via source_id.
 """
 
 from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import JSONB
+
 from app.database import db
 
 
@@ -71,6 +74,22 @@ class Drug(db.Model):
         return data
 
 
+class DrugBrandName(db.Model):
+    """
+    Normalized, lowercased brand-name rows mirroring Drug.brand_names.
+    Lets brand lookups use an indexed equality join instead of scanning
+    (and Python-lowercasing) every drug's ARRAY column.
+    """
+    __tablename__ = "drug_brand_names"
+    __table_args__ = (
+        db.Index("ix_brand_lower", "brand_lower"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    drug_id = db.Column(db.Integer, db.ForeignKey("drugs.id", ondelete="CASCADE"), nullable=False)
+    brand_lower = db.Column(db.String(300), nullable=False)
+
+
 class Indication(db.Model):
     __tablename__ = "indications"
 
@@ -130,20 +149,23 @@ class SafetyWarning(db.Model):
     lactation_risk = db.Column(db.Text)
     adverse_event_count = db.Column(db.Integer)         # FAERS total reports
     adverse_event_serious_count = db.Column(db.Integer) # FAERS serious reports
-    top_adverse_reactions = db.Column(db.Text)           # JSON string of top reactions
+    # JSONB on PostgreSQL (queryable, no serialize/parse round-trip);
+    # plain JSON elsewhere (SQLite test suite).
+    top_adverse_reactions = db.Column(db.JSON().with_variant(JSONB, "postgresql"))
     source_id = db.Column(db.Integer, db.ForeignKey("sources.source_id"), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     source = db.relationship("Source", lazy="joined")
 
     def to_dict(self):
-        import json
-        top_reactions = []
-        if self.top_adverse_reactions:
+        top_reactions = self.top_adverse_reactions or []
+        if isinstance(top_reactions, str):
+            # Legacy TEXT rows written before the JSONB migration
+            import json
             try:
-                top_reactions = json.loads(self.top_adverse_reactions)
+                top_reactions = json.loads(top_reactions)
             except (json.JSONDecodeError, TypeError):
-                pass
+                top_reactions = []
         return {
             "contraindications": self.contraindications,
             "black_box_warnings": self.black_box_warnings,
@@ -269,11 +291,20 @@ class AuditLog(db.Model):
 
 class Embedding(db.Model):
     __tablename__ = "embeddings"
+    __table_args__ = (
+        # (entity_type, entity_id, field_name) is the natural key — enforced
+        # so inserts can use ON CONFLICT DO NOTHING instead of a SELECT check.
+        db.Index("embedding_entity_uniq", "entity_type", "entity_id", "field_name", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     entity_type = db.Column(db.String(50), nullable=False)
     entity_id = db.Column(db.Integer, nullable=False)
     field_name = db.Column(db.String(100))
+    # Stored as a plain float array: at the catalog's scale (~100s-1000s
+    # of drugs) search is served from an in-memory float32 matrix, so
+    # quantized/binary storage formats would complicate ingestion and
+    # reads for no measurable win.
     embedding = db.Column(db.ARRAY(db.Float), nullable=False)
     model_name = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -15,9 +15,13 @@ import logging
 from datetime import datetime
 from typing import Optional
 
+import json
+
+from sqlalchemy import bindparam, func, select, text
+
 from app.database import db
 from app.models.models import (
-    Drug, Source, Indication, DosageGuideline, SafetyWarning,
+    Drug, DrugBrandName, Source, Indication, DosageGuideline, SafetyWarning,
     DrugInteraction, Pricing, Reimbursement, Embedding, IngestionLog,
 )
 from app.services.drug_sources.base_source import NormalizedDrugData
@@ -26,11 +30,25 @@ from app.services.drug_sources.dailymed_source import DailyMedSource
 from app.services.drug_sources.rxnorm_source import RxNormSource
 from app.services.drug_sources.nadac_source import NADACSource
 from app.services.verification_service import verify_drug_data, VerificationResult
-from app.services.embedding_service import build_drug_text, generate_embedding
+from app.services.embedding_service import (
+    build_drug_text,
+    generate_embedding,
+    invalidate_drug_index,
+)
 from app.config import Config
 
 logger = logging.getLogger("clerasense.ingestion")
 
+
+def _insert_stmt(model):
+    """Dialect-aware INSERT builder supporting ON CONFLICT DO NOTHING.
+    PostgreSQL in production; SQLite in the test suite."""
+    if db.session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(model)
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    return sqlite_insert(model)
+
 # Instantiate source adapters
 _openfda = OpenFDASource()
 _dailymed = DailyMedSource()
@@ -104,10 +122,19 @@ def _get_or_create_source(
     return source
 
 
+# Built once at import — skips per-call ORM-to-SQL compilation on the hot
+# existence check. lower() equality matches the drug_generic_lower index.
+_DRUG_EXISTS_STMT = (
+    select(Drug.id)
+    .where(func.lower(Drug.generic_name) == bindparam("name"))
+    .limit(1)
+)
+
+
 def _drug_exists(generic_name: str) -> bool:
     """Check if a drug already exists in the database."""
-    return Drug.query.filter(
-        Drug.generic_name.ilike(generic_name.strip())
+    return db.session.execute(
+        _DRUG_EXISTS_STMT, {"name": generic_name.strip().lower()}
     ).first() is not None
 
 
@@ -140,74 +167,7 @@ def _insert_verified_drug(data: NormalizedDrugData, verification: VerificationRe
                 )
                 additional_sources[src_name] = alt_source
 
-        # Insert drug
-        drug = Drug(
-            generic_name=data.generic_name.strip().title(),
-            brand_names=data.brand_names or [],
-            drug_class=data.drug_class or "",
-            mechanism_of_action=data.mechanism_of_action or "",
-            source_id=primary_source.source_id,
-        )
-        db.session.add(drug)
-        db.session.flush()
-
-        # Indications
-        for indication_text in (data.indications or []):
-            if indication_text and indication_text.strip():
-                ind = Indication(
-                    drug_id=drug.id,
-                    approved_use=indication_text.strip(),
-                    source_id=primary_source.source_id,
-                )
-                db.session.add(ind)
-
-        # Dosage
-        if data.adult_dosage or data.pediatric_dosage:
-            dosage = DosageGuideline(
-                drug_id=drug.id,
-                adult_dosage=data.adult_dosage or None,
-                pediatric_dosage=data.pediatric_dosage or None,
-                renal_adjustment=data.renal_adjustment or None,
-                hepatic_adjustment=data.hepatic_adjustment or None,
-                overdose_info=data.overdose_info or None,
-                underdose_info=data.underdose_info or None,
-                administration_info=data.administration_info or None,
-                source_id=primary_source.source_id,
-            )
-            db.session.add(dosage)
-
-        # Safety warnings — always create a record so the safety module has data
-        import json
-        top_reactions_json = json.dumps(data.top_adverse_reactions) if data.top_adverse_reactions else None
-        safety = SafetyWarning(
-            drug_id=drug.id,
-            contraindications=data.contraindications or "No specific contraindications listed in FDA labeling.",
-            black_box_warnings=data.black_box_warnings or None,
-            pregnancy_risk=data.pregnancy_risk or "Consult prescribing information for pregnancy safety data.",
-            lactation_risk=data.lactation_risk or "Consult prescribing information for lactation safety data.",
-            adverse_event_count=data.adverse_event_count,
-            adverse_event_serious_count=data.adverse_event_serious_count,
-            top_adverse_reactions=top_reactions_json,
-            source_id=primary_source.source_id,
-        )
-        db.session.add(safety)
-
-        # Drug interactions
-        for ix in (data.interactions or []):
-            interaction = DrugInteraction(
-                drug_id=drug.id,
-                interacting_drug=ix.get("interacting_drug", "Unknown"),
-                severity=ix.get("severity", "moderate"),
-                description=ix.get("description", ""),
-                source_id=primary_source.source_id,
-            )
-            db.session.add(interaction)
-
         # Pricing — prefer NADAC real data over estimates
-        approximate_cost = data.approximate_cost or "Contact pharmacy for current pricing"
-        generic_available = data.generic_available if data.generic_available is not None else False
-
-        # Determine pricing source type
         pricing_source_type = "NADAC" if data.nadac_per_unit else "estimate"
 
         # If we have NADAC data, create a NADAC source for pricing
@@ -224,18 +184,17 @@ def _insert_verified_drug(data: NormalizedDrugData, verification: VerificationRe
         else:
             pricing_source_id = primary_source.source_id
 
-        price = Pricing(
-            drug_id=drug.id,
-            approximate_cost=approximate_cost,
-            generic_available=generic_available,
-            nadac_per_unit=data.nadac_per_unit,
-            nadac_ndc=data.nadac_ndc or None,
-            nadac_effective_date=data.nadac_effective_date or None,
-            nadac_package_description=data.nadac_package_description or None,
-            pricing_source=pricing_source_type,
-            source_id=pricing_source_id,
-        )
-        db.session.add(price)
+        # Write the drug + all child rows. On PostgreSQL the whole graph
+        # goes down as one CTE-chained statement (single round-trip);
+        # other dialects use the ORM path.
+        if db.session.get_bind().dialect.name == "postgresql":
+            drug = _insert_drug_graph_cte(
+                data, primary_source.source_id, pricing_source_id, pricing_source_type
+            )
+        else:
+            drug = _insert_drug_graph_orm(
+                data, primary_source.source_id, pricing_source_id, pricing_source_type
+            )
 
         db.session.commit()
         logger.info("Inserted drug '%s' (id=%s) with %.1f%% confidence",
@@ -248,35 +207,239 @@ def _insert_verified_drug(data: NormalizedDrugData, verification: VerificationRe
         return None
 
 
+# One round-trip for the whole drug graph: drug, indications, dosage,
+# safety, interactions and pricing ride a single CTE chain.
+_INSERT_GRAPH_SQL = text("""
+    WITH d AS (
+        INSERT INTO drugs (generic_name, brand_names, drug_class,
+                           mechanism_of_action, source_id, created_at)
+        VALUES (:generic_name, CAST(:brand_names AS text[]), :drug_class,
+                :mechanism_of_action, :source_id, now())
+        RETURNING id
+    ),
+    bn AS (
+        INSERT INTO drug_brand_names (drug_id, brand_lower)
+        SELECT DISTINCT d.id, lower(b.name)
+        FROM d, unnest(CAST(:brand_names AS text[])) AS b(name)
+    ),
+    ind AS (
+        INSERT INTO indications (drug_id, approved_use, source_id, created_at)
+        SELECT d.id, t.approved_use, :source_id, now()
+        FROM d, unnest(CAST(:indications AS text[])) AS t(approved_use)
+    ),
+    dos AS (
+        INSERT INTO dosage_guidelines (drug_id, adult_dosage, pediatric_dosage,
+                                       renal_adjustment, hepatic_adjustment,
+                                       overdose_info, underdose_info,
+                                       administration_info, source_id, created_at)
+        SELECT d.id, :adult_dosage, :pediatric_dosage, :renal_adjustment,
+               :hepatic_adjustment, :overdose_info, :underdose_info,
+               :administration_info, :source_id, now()
+        FROM d
+        WHERE :has_dosage
+    ),
+    saf AS (
+        INSERT INTO safety_warnings (drug_id, contraindications, black_box_warnings,
+                                     pregnancy_risk, lactation_risk,
+                                     adverse_event_count, adverse_event_serious_count,
+                                     top_adverse_reactions, source_id, created_at)
+        SELECT d.id, :contraindications, :black_box_warnings, :pregnancy_risk,
+               :lactation_risk, :adverse_event_count, :adverse_event_serious_count,
+               CAST(:top_adverse_reactions AS jsonb), :source_id, now()
+        FROM d
+    ),
+    ix AS (
+        INSERT INTO drug_interactions (drug_id, interacting_drug, severity,
+                                       description, source_id, created_at)
+        SELECT d.id, r.interacting_drug, r.severity, r.description, :source_id, now()
+        FROM d, jsonb_to_recordset(CAST(:interactions AS jsonb))
+                 AS r(interacting_drug text, severity text, description text)
+    )
+    INSERT INTO pricing (drug_id, approximate_cost, generic_available, nadac_per_unit,
+                         nadac_ndc, nadac_effective_date, nadac_package_description,
+                         pricing_source, source_id, created_at)
+    SELECT d.id, :approximate_cost, :generic_available, :nadac_per_unit, :nadac_ndc,
+           :nadac_effective_date, :nadac_package_description, :pricing_source,
+           :pricing_source_id, now()
+    FROM d
+    RETURNING drug_id
+""")
+
+
+def _insert_drug_graph_cte(
+    data: NormalizedDrugData,
+    source_id: int,
+    pricing_source_id: int,
+    pricing_source_type: str,
+) -> Drug:
+    """PostgreSQL fast path: insert the full drug graph in one statement."""
+    interactions = [
+        {
+            "interacting_drug": ix.get("interacting_drug", "Unknown"),
+            "severity": ix.get("severity", "moderate"),
+            "description": ix.get("description", ""),
+        }
+        for ix in (data.interactions or [])
+    ]
+    result = db.session.execute(_INSERT_GRAPH_SQL, {
+        "generic_name": data.generic_name.strip().title(),
+        # list() — psycopg2 adapts lists to arrays but tuples to ROWs
+        "brand_names": list(data.brand_names or ()),
+        "drug_class": data.drug_class or "",
+        "mechanism_of_action": data.mechanism_of_action or "",
+        "source_id": source_id,
+        "indications": [t.strip() for t in (data.indications or []) if t and t.strip()],
+        "has_dosage": bool(data.adult_dosage or data.pediatric_dosage),
+        "adult_dosage": data.adult_dosage or None,
+        "pediatric_dosage": data.pediatric_dosage or None,
+        "renal_adjustment": data.renal_adjustment or None,
+        "hepatic_adjustment": data.hepatic_adjustment or None,
+        "overdose_info": data.overdose_info or None,
+        "underdose_info": data.underdose_info or None,
+        "administration_info": data.administration_info or None,
+        "contraindications": data.contraindications or "No specific contraindications listed in FDA labeling.",
+        "black_box_warnings": data.black_box_warnings or None,
+        "pregnancy_risk": data.pregnancy_risk or "Consult prescribing information for pregnancy safety data.",
+        "lactation_risk": data.lactation_risk or "Consult prescribing information for lactation safety data.",
+        "adverse_event_count": data.adverse_event_count,
+        "adverse_event_serious_count": data.adverse_event_serious_count,
+        "top_adverse_reactions": (
+            json.dumps(data.top_adverse_reactions, separators=(",", ":"), ensure_ascii=False)
+            if data.top_adverse_reactions else None
+        ),
+        "interactions": json.dumps(interactions, separators=(",", ":"), ensure_ascii=False),
+        "approximate_cost": data.approximate_cost or "Contact pharmacy for current pricing",
+        "generic_available": data.generic_available if data.generic_available is not None else False,
+        "nadac_per_unit": data.nadac_per_unit,
+        "nadac_ndc": data.nadac_ndc or None,
+        "nadac_effective_date": data.nadac_effective_date or None,
+        "nadac_package_description": data.nadac_package_description or None,
+        "pricing_source": pricing_source_type,
+        "pricing_source_id": pricing_source_id,
+    })
+    drug_id = result.scalar_one()
+    return db.session.get(Drug, drug_id)
+
+
+def _insert_drug_graph_orm(
+    data: NormalizedDrugData,
+    source_id: int,
+    pricing_source_id: int,
+    pricing_source_type: str,
+) -> Drug:
+    """Portable ORM path for dialects without CTE-chained inserts (SQLite)."""
+    drug = Drug(
+        generic_name=data.generic_name.strip().title(),
+        brand_names=list(data.brand_names or ()),
+        drug_class=data.drug_class or "",
+        mechanism_of_action=data.mechanism_of_action or "",
+        source_id=source_id,
+    )
+    db.session.add(drug)
+    db.session.flush()
+
+    # Mirror brands into the normalized lookup table
+    for brand in {b.lower() for b in (data.brand_names or [])}:
+        db.session.add(DrugBrandName(drug_id=drug.id, brand_lower=brand))
+
+    # Indications
+    for indication_text in (data.indications or []):
+        if indication_text and indication_text.strip():
+            ind = Indication(
+                drug_id=drug.id,
+                approved_use=indication_text.strip(),
+                source_id=source_id,
+            )
+            db.session.add(ind)
+
+    # Dosage
+    if data.adult_dosage or data.pediatric_dosage:
+        dosage = DosageGuideline(
+            drug_id=drug.id,
+            adult_dosage=data.adult_dosage or None,
+            pediatric_dosage=data.pediatric_dosage or None,
+            renal_adjustment=data.renal_adjustment or None,
+            hepatic_adjustment=data.hepatic_adjustment or None,
+            overdose_info=data.overdose_info or None,
+            underdose_info=data.underdose_info or None,
+            administration_info=data.administration_info or None,
+            source_id=source_id,
+        )
+        db.session.add(dosage)
+
+    # Safety warnings — always create a record so the safety module has data
+    safety = SafetyWarning(
+        drug_id=drug.id,
+        contraindications=data.contraindications or "No specific contraindications listed in FDA labeling.",
+        black_box_warnings=data.black_box_warnings or None,
+        pregnancy_risk=data.pregnancy_risk or "Consult prescribing information for pregnancy safety data.",
+        lactation_risk=data.lactation_risk or "Consult prescribing information for lactation safety data.",
+        adverse_event_count=data.adverse_event_count,
+        adverse_event_serious_count=data.adverse_event_serious_count,
+        # JSON column — the driver serializes, no json.dumps needed
+        top_adverse_reactions=data.top_adverse_reactions or None,
+        source_id=source_id,
+    )
+    db.session.add(safety)
+
+    # Drug interactions
+    for ix in (data.interactions or []):
+        interaction = DrugInteraction(
+            drug_id=drug.id,
+            interacting_drug=ix.get("interacting_drug", "Unknown"),
+            severity=ix.get("severity", "moderate"),
+            description=ix.get("description", ""),
+            source_id=source_id,
+        )
+        db.session.add(interaction)
+
+    price = Pricing(
+        drug_id=drug.id,
+        approximate_cost=data.approximate_cost or "Contact pharmacy for current pricing",
+        generic_available=data.generic_available if data.generic_available is not None else False,
+        nadac_per_unit=data.nadac_per_unit,
+        nadac_ndc=data.nadac_ndc or None,
+        nadac_effective_date=data.nadac_effective_date or None,
+        nadac_package_description=data.nadac_package_description or None,
+        pricing_source=pricing_source_type,
+        source_id=pricing_source_id,
+    )
+    db.session.add(price)
+    return drug
+
+
 def _generate_embedding_for_drug(drug: Drug) -> None:
     """Generate and store embedding for a newly inserted drug."""
     try:
-        # Check if already exists
-        existing = Embedding.query.filter_by(
-            entity_type="drug", entity_id=drug.id, field_name="full_profile"
-        ).first()
-        if existing:
-            return
-
-        text = build_drug_text(drug)
-        vec = generate_embedding(text)
+        profile_text = build_drug_text(drug)
+        vec = generate_embedding(profile_text)
         if vec:
-            emb = Embedding(
+            # Single round-trip, race-free: the embedding_entity_uniq index
+            # makes (entity_type, entity_id, field_name) a natural key, so
+            # ON CONFLICT DO NOTHING replaces the old SELECT-then-INSERT.
+            stmt = _insert_stmt(Embedding).values(
                 entity_type="drug",
                 entity_id=drug.id,
                 field_name="full_profile",
                 embedding=vec,
                 model_name=Config.EMBEDDING_MODEL_NAME,
+            ).on_conflict_do_nothing(
+                index_elements=["entity_type", "entity_id", "field_name"]
             )
-            db.session.add(emb)
+            db.session.execute(stmt)
             db.session.commit()
+            invalidate_drug_index()
             logger.info("Generated embedding for drug '%s'", drug.generic_name)
     except Exception as exc:
         db.session.rollback()
         logger.warning("Embedding generation failed for '%s': %s", drug.generic_name, exc)
 
 
-def ingest_single_drug(drug_name: str, delay_scale: float = 0.2) -> dict:
+def ingest_single_drug(
+    drug_name: str,
+    delay_scale: float = 0.2,
+    prefetched: Optional[dict[str, NormalizedDrugData]] = None,
+) -> dict:
     """
     Full ingestion pipeline for a single drug:
       1. Check if already in DB
@@ -288,6 +451,9 @@ def ingest_single_drug(drug_name: str, delay_scale: float = 0.2) -> dict:
     Args:
         delay_scale: Multiplier for API rate-limit sleep.
             0.2 = fast on-demand (~3-5x speedup), 1.0 = safe batch mode.
+        prefetched: Records already fetched by a batch sweep, keyed by
+            fetcher name ("OpenFDA", "NADAC", ...). A prefetched source
+            is used as-is instead of re-fetching per drug.
 
     Returns a status dict.
     """
@@ -314,6 +480,11 @@ def ingest_single_drug(drug_name: str, delay_scale: float = 0.2) -> dict:
         "RxNorm": lambda: rx.fetch_drug_data(drug_name),
         "NADAC": lambda: nadac.fetch_drug_data(drug_name),
     }
+    # Swap in records a batch sweep already fetched; a None/missing entry
+    # falls back to the per-drug fetch above.
+    for src_name, record in (prefetched or {}).items():
+        if record is not None and src_name in fetchers:
+            fetchers[src_name] = lambda record=record: record
 
     with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
         future_to_name = {
@@ -398,8 +569,23 @@ def discover_and_ingest(batch_size: int = 20, max_batches: int = 5) -> dict:
 
         stats["discovered"] += len(drug_names)
 
+        # Prefetch OpenFDA labels for the whole batch with one OR-batched
+        # label query per ~40 names instead of one query per drug — the
+        # label-fetch delay dominates the bootstrap sweep. NADAC pricing
+        # for the batch is fetched with overlapped network waits the same
+        # way, instead of one serial rate-limited call per drug.
+        new_names = [n for n in drug_names if not _drug_exists(n)]
+        fda_batch = _openfda.fetch_drug_data_batch(new_names) if new_names else {}
+        nadac_batch = _nadac.fetch_pricing_batch(new_names) if new_names else {}
+
         for name in drug_names:
-            result = ingest_single_drug(name, delay_scale=1.0)
+            key = name.strip()
+            pricing = nadac_batch.get(key)
+            prefetched = {
+                "OpenFDA": fda_batch.get(key),
+                "NADAC": _nadac.record_from_pricing(key, pricing) if pricing else None,
+            }
+            result = ingest_single_drug(name, delay_scale=1.0, prefetched=prefetched)
             status = result.get("status", "unknown")
 
             if status == "ingested":
@@ -428,8 +614,16 @@ def update_existing_drugs() -> dict:
     """
     stats = {"updated": 0, "unchanged": 0, "errors": 0}
 
-    drugs = Drug.query.all()
-    for drug in drugs:
+    # Stream by primary key instead of Drug.query.all(): materializing the
+    # whole catalogue (plus eagerly-loaded relations) blows up RAM and pins
+    # every row in the session identity map for the life of the run. A bare
+    # id list is tiny, and per-drug commits below would invalidate a
+    # server-side cursor anyway.
+    drug_ids = [row[0] for row in db.session.query(Drug.id).order_by(Drug.id)]
+    for drug_id in drug_ids:
+        drug = db.session.get(Drug, drug_id)
+        if drug is None:  # deleted since the id scan
+            continue
         try:
             name = drug.generic_name
 
@@ -470,6 +664,9 @@ def update_existing_drugs() -> dict:
                 new_brands = [b for b in merged.brand_names if b.lower() not in existing_brands]
                 if new_brands:
                     drug.brand_names = list(set((drug.brand_names or []) + new_brands))
+                    # Keep the normalized brand lookup table in sync
+                    for brand in {b.lower() for b in new_brands}:
+                        db.session.add(DrugBrandName(drug_id=drug.id, brand_lower=brand))
                     updated = True
 
             if merged.drug_class and not drug.drug_class:
@@ -477,16 +674,19 @@ def update_existing_drugs() -> dict:
                 updated = True
 
             if updated:
-                db.session.commit()
-                stats["updated"] += 1
-                # Regenerate embedding
-                existing_emb = Embedding.query.filter_by(
+                # Field updates and the stale-embedding delete share one
+                # commit (one fsync instead of two). The bulk DELETE skips
+                # the SELECT-and-hydrate round-trip. The commit must land
+                # BEFORE the embedding refresh: _generate_embedding_for_drug
+                # rolls the session back on failure (e.g. embedding API
+                # down), which would otherwise discard the pending updates
+                # while stats still counted the drug as updated.
+                Embedding.query.filter_by(
                     entity_type="drug", entity_id=drug.id, field_name="full_profile"
-                ).first()
-                if existing_emb:
-                    db.session.delete(existing_emb)
-                    db.session.commit()
+                ).delete(synchronize_session=False)
+                db.session.commit()
                 _generate_embedding_for_drug(drug)
+                stats["updated"] += 1
             else:
                 stats["unchanged"] += 1
 
@@ -494,5 +694,9 @@ def update_existing_drugs() -> dict:
             db.session.rollback()
             logger.error("Update failed for drug '%s': %s", drug.generic_name, exc)
             stats["errors"] += 1
+        finally:
+            # Release the row (and its eagerly-loaded relations) so memory
+            # stays flat regardless of catalogue size.
+            db.session.expunge_all()
 
     return stats
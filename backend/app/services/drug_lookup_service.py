@@ -17,21 +17,116 @@ Lookup flow:
 
 import concurrent.futures
 import logging
+import threading
 from typing import Optional
 
-from flask import current_app
+from cachetools import TTLCache
+from flask import current_app, g, has_app_context
+from sqlalchemy import bindparam, func, select, text
 
 from app.database import db
-from app.models.models import Drug
+from app.models.models import Drug, DrugBrandName
 
 logger = logging.getLogger("clerasense.lookup")
 
+# Compiled once at import so the hot exact-match lookup skips per-call
+# ORM-to-SQL compilation. lower() equality is index-friendly (see the
+# drug_generic_lower migration) where ILIKE forces a sequential scan.
+_EXACT_NAME_STMT = select(Drug).where(
+    func.lower(Drug.generic_name) == bindparam("name")
+)
+
+# Prefix match ("metformin" → "Metformin Hydrochloride") — index-served via
+# text_pattern_ops, unlike the '%name%' substring fallback below it.
+_PREFIX_NAME_STMT = (
+    select(Drug)
+    .where(func.lower(Drug.generic_name).like(bindparam("prefix")))
+    .limit(1)
+)
+
+
+def _find_by_exact_name(name: str) -> Optional[Drug]:
+    """Case-insensitive exact match on generic_name via the prepared statement."""
+    return db.session.execute(
+        _EXACT_NAME_STMT, {"name": name.strip().lower()}
+    ).scalars().first()
+
+
+def _find_by_brand(name: str) -> Optional[Drug]:
+    """
+    Case-insensitive match against a drug's brand names.
+
+    Uses the normalized drug_brand_names side table (indexed equality join,
+    portable across backends). Drugs written before the side table was
+    backfilled are caught by a fallback — server-side on PostgreSQL, an
+    in-memory scan elsewhere.
+    """
+    lowered = name.lower()
+
+    drug = (
+        Drug.query
+        .join(DrugBrandName, DrugBrandName.drug_id == Drug.id)
+        .filter(DrugBrandName.brand_lower == lowered)
+        .first()
+    )
+    if drug:
+        return drug
+
+    if db.session.get_bind().dialect.name == "postgresql":
+        # Detect the prod backend at runtime instead of pessimistically
+        # assuming SQLite: containment check runs inside the database.
+        stmt = (
+            select(Drug)
+            .where(text(
+                "EXISTS (SELECT 1 FROM unnest(drugs.brand_names) AS b "
+                "WHERE lower(b) = :brand)"
+            ).bindparams(brand=lowered))
+            .limit(1)
+        )
+        return db.session.execute(stmt).scalars().first()
+
+    # Scan raw (id, brand_names) tuples instead of hydrating full ORM
+    # rows with their large text columns; only the winner is loaded.
+    rows = db.session.execute(select(Drug.id, Drug.brand_names))
+    hit = next(
+        (drug_id for drug_id, brands in rows
+         if brands and any(b.lower() == lowered for b in brands)),
+        None,
+    )
+    return db.session.get(Drug, hit) if hit is not None else None
+
+
+# Per-request memoization cap — chat/comparison/safety flows resolve at
+# most a handful of drugs, so a small bound is plenty.
+_REQUEST_CACHE_MAX = 32
+
+# Process-wide name → drug id cache. Only the primary key is cached and
+# re-attached via db.session.get, so ORM identity stays session-local.
+# Misses are never cached, so freshly ingested drugs are picked up without
+# explicit invalidation.
+_LOOKUP_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=600)
+_lookup_cache_lock = threading.Lock()
+
+
+def _request_cache() -> Optional[dict]:
+    """Return the g-scoped lookup cache, or None outside an app context."""
+    if not has_app_context():
+        return None
+    cache = getattr(g, "_drug_cache", None)
+    if cache is None:
+        cache = g._drug_cache = {}
+    return cache
+
 
 def lookup_drug(name: str) -> Optional[Drug]:
     """
     Look up a drug by generic name.
     If not in the DB, triggers on-demand ingestion from public APIs.
 
+    Repeated lookups of the same name within one request are memoized in
+    flask.g, so modules that each resolve the same drug (chat, comparison,
+    safety, pricing) share a single DB round-trip.
+
     Returns:
         Drug ORM object (with all relations loaded) or None.
     """
@@ -39,29 +134,60 @@ def lookup_drug(name: str) -> Optional[Drug]:
     if not name:
         return None
 
+    cache = _request_cache()
+    cache_key = name.lower()
+    if cache is not None and cache_key in cache:
+        return cache[cache_key]
+
+    # Cross-request TTL cache: resolve the cached pk in this session
+    with _lookup_cache_lock:
+        cached_id = _LOOKUP_CACHE.get(cache_key)
+    if cached_id is not None:
+        drug = db.session.get(Drug, cached_id)
+        if drug is not None:
+            logger.debug("lookup cache hit for '%s'", name)
+            if cache is not None and len(cache) < _REQUEST_CACHE_MAX:
+                cache[cache_key] = drug
+            return drug
+        with _lookup_cache_lock:  # row deleted since it was cached
+            _LOOKUP_CACHE.pop(cache_key, None)
+
+    logger.debug("lookup cache miss for '%s'", name)
+    drug = _lookup_drug_uncached(name)
+
+    if drug is not None:
+        with _lookup_cache_lock:
+            _LOOKUP_CACHE[cache_key] = drug.id
+    if cache is not None and len(cache) < _REQUEST_CACHE_MAX:
+        cache[cache_key] = drug
+    return drug
+
+
+def _lookup_drug_uncached(name: str) -> Optional[Drug]:
+    """The uncached DB/ingestion lookup ladder behind lookup_drug."""
     # 1. Try exact match (case-insensitive)
-    drug = Drug.query.filter(Drug.generic_name.ilike(name)).first()
+    drug = _find_by_exact_name(name)
     if drug:
         return drug
 
-    # 2. Try partial match (e.g. user typed "metformin hcl" but DB has "Metformin")
-    drug = Drug.query.filter(Drug.generic_name.ilike(f"%{name}%")).first()
+    # 2. Try prefix match (indexable; covers "metformin" → "Metformin Hcl")
+    drug = db.session.execute(
+        _PREFIX_NAME_STMT, {"prefix": name.lower() + "%"}
+    ).scalars().first()
     if drug:
         return drug
 
-    # 3. Try matching against brand names
-    # Use an in-memory scan because ARRAY .any() is PostgreSQL-specific
-    # and does not work with SQLite or other backends.
-    all_drugs = Drug.query.all()
-    for d in all_drugs:
-        if any(b.lower() == name.lower() for b in (d.brand_names or [])):
-            drug = d
-            break
+    # 3. Try substring match (e.g. user typed "metformin hcl" but DB has "Metformin")
+    drug = Drug.query.filter(Drug.generic_name.ilike(f"%{name}%")).first()
+    if drug:
+        return drug
 
+    # 4. Try matching against brand names
+    drug = _find_by_brand(name)
     if drug:
         return drug
 
-    # 4. Not in DB — trigger on-demand ingestion
+    # 5. Not in DB — trigger on-demand ingestion
     logger.info("Drug '%s' not in DB, attempting on-demand ingestion...", name)
     drug = _on_demand_ingest(name)
     return drug
@@ -72,8 +198,10 @@ def lookup_drugs(names: list[str]) -> tuple[list[Drug], list[str]]:
     Look up multiple drugs by name — with parallel on-demand ingestion.
 
     Phase 1: Batch check which drugs are already in the DB (fast).
-    Phase 2: Ingest all missing drugs in parallel threads.
-    Phase 3: Reload results from the main DB session.
+    Phase 2: Ingest all missing drugs in parallel threads; each worker
+             reports back the new drug id, which is resolved in the
+             calling session (identity-map hit or a single cheap
+             primary-key get) — no bulk reload query needed.
 
     Returns (found_drugs, not_found_names).
     """
@@ -84,27 +212,46 @@ def lookup_drugs(names: list[str]) -> tuple[list[Drug], list[str]]:
     if not clean_names:
         return [], []
 
-    # ── Phase 1: fast DB scan ──────────────────────────────────────
+    # ── Phase 1: fast DB scan — two IN (...) queries instead of up to
+    #    three statements per name ─────────────────────────────────────
     found_map: dict[str, Drug] = {}            # clean_name → Drug
     missing: list[str] = []
 
+    by_generic = {
+        d.generic_name.lower(): d
+        for d in Drug.query.filter(
+            func.lower(Drug.generic_name).in_([n.lower() for n in clean_names])
+        ).all()
+    }
+    unresolved = []
     for name in clean_names:
-        drug = Drug.query.filter(Drug.generic_name.ilike(name)).first()
-        if not drug:
-            drug = Drug.query.filter(Drug.generic_name.ilike(f"%{name}%")).first()
+        drug = by_generic.get(name.lower())
         if drug:
             found_map[name] = drug
-            continue
-
-        # brand-name fallback
-        matched = False
-        for d in Drug.query.all():
-            if any(b.lower() == name.lower() for b in (d.brand_names or [])):
-                found_map[name] = d
-                matched = True
-                break
-        if not matched:
-            missing.append(name)
+        else:
+            unresolved.append(name)
+
+    if unresolved:
+        # One batched pass over the brand side table for the leftovers
+        by_brand = dict(
+            db.session.query(DrugBrandName.brand_lower, Drug)
+            .join(Drug, Drug.id == DrugBrandName.drug_id)
+            .filter(DrugBrandName.brand_lower.in_([n.lower() for n in unresolved]))
+            .all()
+        )
+        for name in unresolved:
+            drug = by_brand.get(name.lower())
+            if not drug:
+                # rare path: fuzzy prefix/substring match per residual name
+                drug = db.session.execute(
+                    _PREFIX_NAME_STMT, {"prefix": name.lower() + "%"}
+                ).scalars().first()
+            if not drug:
+                drug = Drug.query.filter(Drug.generic_name.ilike(f"%{name}%")).first()
+            if drug:
+                found_map[name] = drug
+            else:
+                missing.append(name)
 
     # ── Phase 2: parallel on-demand ingestion for missing drugs ────
     if missing:
@@ -112,37 +259,36 @@ def lookup_drugs(names: list[str]) -> tuple[list[Drug], list[str]]:
 
         def _ingest_in_context(drug_name: str):
             """Run ingestion inside its own app context so each thread
-            gets a fresh scoped DB session."""
+            gets a fresh scoped DB session. Returns only the drug id —
+            the ORM object itself would be detached from the caller's
+            session."""
             with app.app_context():
-                return drug_name, _on_demand_ingest(drug_name)
+                drug = _on_demand_ingest(drug_name)
+                return drug_name, (drug.id if drug else None)
 
-        workers = min(len(missing), 4)
+        # Ingestion is network-bound (4 public APIs with rate-limit sleeps),
+        # so a wider pool just overlaps more HTTP latency.
+        workers = min(len(missing), 8)
         with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
             futures = [pool.submit(_ingest_in_context, n) for n in missing]
             for fut in concurrent.futures.as_completed(futures):
                 try:
-                    name, drug = fut.result()
-                    if drug:
-                        found_map[name] = drug
+                    name, drug_id = fut.result()
+                    if drug_id is not None:
+                        drug = db.session.get(Drug, drug_id)
+                        if drug:
+                            found_map[name] = drug
                 except Exception as exc:
                     logger.error("Parallel ingestion error: %s", exc)
 
-    # ── Phase 3: reload in the *current* session to avoid detached objects
-    drug_ids = [d.id for d in found_map.values()]
-    if drug_ids:
-        reloaded = {d.id: d for d in
-                    Drug.query.filter(Drug.id.in_(drug_ids)).all()}
-    else:
-        reloaded = {}
-
     # preserve original order
     found: list[Drug] = []
     not_found: list[str] = []
     seen_ids: set[int] = set()
     for name in clean_names:
         drug = found_map.get(name)
-        if drug and drug.id in reloaded and drug.id not in seen_ids:
-            found.append(reloaded[drug.id])
+        if drug and drug.id not in seen_ids:
+            found.append(drug)
             seen_ids.add(drug.id)
         elif not drug:
             not_found.append(name)
@@ -159,7 +305,8 @@ def search_drugs(query: str, limit: int = 10) -> list[Drug]:
     if not query:
         return []
 
-    # DB keyword search
+    # DB keyword search — index-driven on PostgreSQL via the pg_trgm GIN
+    # indexes (migrations.add_trigram_indexes) rather than a seq scan
     results = Drug.query.filter(
         db.or_(
             Drug.generic_name.ilike(f"%{query}%"),
@@ -188,11 +335,52 @@ def search_drugs(query: str, limit: int = 10) -> list[Drug]:
     return results
 
 
+# Singleflight map: concurrent lookups of the same missing drug share one
+# ingestion run instead of each spawning the full 4-API pipeline.
+_inflight: dict[str, concurrent.futures.Future] = {}
+_inflight_lock = threading.Lock()
+
+
 def _on_demand_ingest(name: str) -> Optional[Drug]:
     """
     Fetch drug from public APIs, verify, insert, and return.
-    This is the on-demand version of the background ingestion pipeline.
+
+    Concurrent calls for the same name are coalesced: the first caller runs
+    the pipeline, later callers block on its result and resolve the drug id
+    in their own session. This avoids duplicate HTTP fan-out and
+    unique-constraint collisions under burst traffic.
     """
+    key = name.strip().lower()
+
+    with _inflight_lock:
+        leader_future = None
+        existing = _inflight.get(key)
+        if existing is None:
+            leader_future = concurrent.futures.Future()
+            _inflight[key] = leader_future
+
+    if existing is not None:
+        # Another thread is already ingesting this drug — join its result.
+        try:
+            drug_id = existing.result(timeout=60)
+        except Exception as exc:
+            logger.warning("Joined ingestion for '%s' failed: %s", name, exc)
+            return None
+        return db.session.get(Drug, drug_id) if drug_id is not None else None
+
+    try:
+        drug = _run_ingestion(name)
+        leader_future.set_result(drug.id if drug else None)
+        return drug
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        if not leader_future.done():  # _run_ingestion raised
+            leader_future.set_result(None)
+
+
+def _run_ingestion(name: str) -> Optional[Drug]:
+    """Single uncoordinated ingestion run behind the singleflight gate."""
     try:
         from app.services.drug_ingestion_service import ingest_single_drug
 
@@ -201,14 +389,14 @@ def _on_demand_ingest(name: str) -> Optional[Drug]:
 
         if status == "ingested":
             # Freshly ingested — fetch from DB
-            drug = Drug.query.filter(Drug.generic_name.ilike(name.strip())).first()
+            drug = _find_by_exact_name(name)
             if drug:
                 logger.info("On-demand ingestion succeeded for '%s'", name)
                 return drug
 
         if status == "skipped":
             # Was already in DB (race condition) — just return it
-            return Drug.query.filter(Drug.generic_name.ilike(name.strip())).first()
+            return _find_by_exact_name(name)
 
         logger.info("On-demand ingestion for '%s' ended with status: %s", name, status)
         return None
@@ -4,20 +4,33 @@ Every source must implement the standard interface for fetching
 drug information in a normalized format.
 """
 
-from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from collections.abc import Sequence
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Protocol, runtime_checkable
 
+# Cached at import: the year default fires for every record a bulk
+# ingestion sweep creates, and a year-boundary drift in a long-running
+# process is acceptable for source attribution.
+_CURRENT_YEAR = datetime.now().year
 
-@dataclass
+
+@dataclass(slots=True)
 class NormalizedDrugData:
-    """Unified drug data structure that all sources produce."""
+    """Unified drug data structure that all sources produce.
+
+    slots=True: a bulk ingestion sweep materializes one of these per
+    source per drug for cross-verification, and ~25 fields of __dict__
+    overhead per instance adds up.
+    """
+    # Sequence fields default to a shared empty tuple rather than a
+    # per-instance list: most sources leave several of them empty, and
+    # consumers reassign whole sequences instead of mutating in place.
     generic_name: str
-    brand_names: list[str] = field(default_factory=list)
+    brand_names: Sequence[str] = ()
     drug_class: str = ""
     mechanism_of_action: str = ""
-    indications: list[str] = field(default_factory=list)
+    indications: Sequence[str] = ()
     adult_dosage: str = ""
     pediatric_dosage: str = ""
     renal_adjustment: str = ""
@@ -29,7 +42,7 @@ class NormalizedDrugData:
     black_box_warnings: str = ""
     pregnancy_risk: str = ""
     lactation_risk: str = ""
-    interactions: list[dict] = field(default_factory=list)  # [{interacting_drug, severity, description}]
+    interactions: Sequence[dict] = ()  # [{interacting_drug, severity, description}]
     approximate_cost: str = ""
     generic_available: Optional[bool] = None
 
@@ -42,33 +55,39 @@ class NormalizedDrugData:
     # --- Adverse event data (from FDA FAERS) ---
     adverse_event_count: Optional[int] = None     # Total adverse event reports
     adverse_event_serious_count: Optional[int] = None  # Serious reports
-    top_adverse_reactions: list[dict] = field(default_factory=list)  # [{reaction, count}]
+    top_adverse_reactions: Sequence[dict] = ()  # [{reaction, count}]
 
     # --- Enhanced source attribution ---
     source_authority: str = ""
     source_document_title: str = ""
     source_url: str = ""
-    source_year: int = field(default_factory=lambda: datetime.now().year)
+    source_year: int = _CURRENT_YEAR
     effective_date: str = ""                      # Label effective date (from FDA)
     data_retrieved_at: str = ""                   # ISO timestamp of when data was fetched
 
 
-class DrugDataSource(ABC):
-    """Abstract base class for drug information APIs."""
+@runtime_checkable
+class DrugDataSource(Protocol):
+    """
+    Structural interface for drug information APIs.
+
+    A Protocol rather than an ABC: adapters are instantiated per
+    on-demand-ingestion call, and structural typing skips the abstract-
+    method bookkeeping on each instantiation. Concrete sources still
+    subclass it for discoverability, but any class with this shape
+    satisfies the interface.
+    """
 
     @property
-    @abstractmethod
     def source_name(self) -> str:
         """Human-readable name of this data source."""
         ...
 
     @property
-    @abstractmethod
     def source_authority(self) -> str:
         """Authority backing the data (e.g. 'FDA', 'NIH/NLM')."""
         ...
 
-    @abstractmethod
     def search_drugs(self, query: str, limit: int = 10) -> list[str]:
         """
         Search for drug names matching a query.
@@ -76,7 +95,6 @@ class DrugDataSource(ABC):
         """
         ...
 
-    @abstractmethod
     def fetch_drug_data(self, generic_name: str) -> Optional[NormalizedDrugData]:
         """
         Fetch full drug information for a given generic name.
@@ -84,7 +102,6 @@ class DrugDataSource(ABC):
         """
         ...
 
-    @abstractmethod
     def fetch_interactions(self, generic_name: str) -> list[dict]:
         """
         Fetch drug-drug interactions for a given drug.
@@ -12,23 +12,44 @@ fetching the SPL XML zip when available.
 
 import logging
 import re
+import tempfile
 import time
-import io
 import zipfile
 from datetime import datetime
 from typing import Optional
-from xml.etree import ElementTree
 
-import requests
+from pathlib import Path
 
-from app.services.drug_sources.base_source import DrugDataSource, NormalizedDrugData
-from app.services.drug_sources.openfda_source import _parse_interaction_text
+import requests_cache
+from lxml import etree
+
+from app.services.drug_sources.base_source import (
+    DrugDataSource, NormalizedDrugData, _CURRENT_YEAR,
+)
 
 logger = logging.getLogger("clerasense.sources.dailymed")
 
 BASE_URL = "https://dailymed.nlm.nih.gov/dailymed/services"
 SEARCH_DELAY = 1.0
 
+# Shared disk-backed HTTP cache: repeat fetches of the same SPL search /
+# ZIP within a day skip both the network round-trip and the rate-limit
+# sleep. Created lazily so importing the module touches no files.
+# The cache file is anchored to the backend directory — a bare name
+# would be CWD-relative, scattering cache files wherever the server
+# happens to start.
+_CACHE_PATH = Path(__file__).resolve().parents[3] / "dailymed_cache"
+_http_session: Optional[requests_cache.CachedSession] = None
+
+
+def _get_http_session() -> requests_cache.CachedSession:
+    global _http_session
+    if _http_session is None:
+        _http_session = requests_cache.CachedSession(
+            str(_CACHE_PATH), backend="sqlite", expire_after=86400
+        )
+    return _http_session
+
 # SPL XML section code → human-readable key
 _SECTION_CODES = {
     "34067-9": "indications_and_usage",
@@ -51,13 +72,53 @@ _SECTION_CODES = {
     "43684-0": "use_in_specific_populations",
 }
 
+# Keyword lists for SPL title scoring, hoisted out of _resolve_spl_setid.
+# Common salt forms that are equivalent to the base drug
+_SALT_SUFFIXES = (
+    "hydrochloride", "hcl", "sulfate", "sodium", "potassium",
+    "maleate", "besylate", "mesylate", "fumarate", "tartrate",
+    "succinate", "calcium", "acetate", "phosphate", "citrate",
+    "dihydrate", "anhydrous", "trihydrate",
+)
+# Dosage form keywords — commas within these are NOT combo indicators
+_DOSAGE_FORMS = (
+    "tablet", "capsule", "solution", "injection", "cream",
+    "ointment", "powder", "suspension", "aerosol", "spray",
+    "patch", "gel", "drops", "inhaler", "suppository", "lozenge",
+    "syrup", "elixir", "emulsion", "pellet", "granule", "kit",
+)
+# Words that signal the product is NOT a pharmaceutical drug
+_NON_DRUG_WORDS = (
+    "sanitizer", "hand wash", "antiseptic", "disinfectant",
+    "cleaning", "cosmetic", "sunscreen", "soap", "shampoo",
+    "toothpaste", "mouthwash", "deodorant",
+)
+
+# Single compiled alternations: one C-level scan per title instead of a
+# Python loop of substring checks per keyword list.
+_NON_DRUG_RE = re.compile("|".join(map(re.escape, _NON_DRUG_WORDS)))
+_SALT_RE = re.compile("|".join(map(re.escape, _SALT_SUFFIXES)))
+_DOSAGE_FORM_RE = re.compile("|".join(map(re.escape, _DOSAGE_FORMS)))
+
+# Compiled once — _clean_xml_text runs ~15× per drug, and the title
+# splitters fire for every candidate in a 25-result SPL search page.
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+_DASH_SPLIT_RE = re.compile(r"\s*[-–]\s*")
+_BRACKET_SPLIT_RE = re.compile(r"\s*\[")
+
+# SPL XML uses the urn:hl7-org:v3 namespace
+_HL7_SECTION = "{urn:hl7-org:v3}section"
+_HL7_CODE = "{urn:hl7-org:v3}code"
+_HL7_TEXT = "{urn:hl7-org:v3}text"
+
 
 def _clean_xml_text(text: str | None) -> str:
     """Strip XML/HTML tags and normalize whitespace."""
     if not text:
         return ""
-    cleaned = re.sub(r"<[^>]+>", " ", text)
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    cleaned = _TAG_RE.sub(" ", text)
+    cleaned = _WS_RE.sub(" ", cleaned).strip()
     if len(cleaned) > 3000:
         cleaned = cleaned[:3000] + "..."
     return cleaned
@@ -73,6 +134,10 @@ class DailyMedSource(DrugDataSource):
 
     def __init__(self, delay_scale: float = 1.0):
         self.delay_scale = delay_scale
+        # Per-instance memos: fetch_drug_data and fetch_interactions for the
+        # same drug share one setid resolution and one ZIP download/parse.
+        self._setid_cache: dict[str, Optional[str]] = {}
+        self._sections_cache: dict[str, dict[str, str]] = {}
 
     @property
     def source_name(self) -> str:
@@ -83,11 +148,13 @@ class DailyMedSource(DrugDataSource):
         return "NIH/NLM"
 
     def _api_get_json(self, endpoint: str, params: dict) -> Optional[dict]:
-        """Rate-limited JSON GET to DailyMed."""
+        """Rate-limited JSON GET to DailyMed (cached on disk for a day)."""
         try:
-            time.sleep(SEARCH_DELAY * self.delay_scale)
             url = f"{BASE_URL}/{endpoint}"
-            resp = requests.get(url, params=params, timeout=30)
+            resp = _get_http_session().get(url, params=params, timeout=30)
+            if not getattr(resp, "from_cache", False):
+                # Pace only real network hits; cache replays are free
+                time.sleep(SEARCH_DELAY * self.delay_scale)
             if resp.status_code == 200:
                 ct = resp.headers.get("Content-Type", "")
                 if "json" in ct or "javascript" in ct:
@@ -116,7 +183,7 @@ class DailyMedSource(DrugDataSource):
         names = set()
         for item in data["data"]:
             title = item.get("title", "")
-            parts = re.split(r"\s*[-–]\s*", title)
+            parts = _DASH_SPLIT_RE.split(title)
             if parts:
                 name = parts[0].strip().title()
                 if name and len(name) > 2:
@@ -132,6 +199,15 @@ class DailyMedSource(DrugDataSource):
         bundles, or unrelated name collisions (e.g. hand sanitizer for
         "ethane").
         """
+        cache_key = generic_name.lower().strip()
+        if cache_key in self._setid_cache:
+            return self._setid_cache[cache_key]
+        setid = self._resolve_spl_setid(generic_name)
+        self._setid_cache[cache_key] = setid
+        return setid
+
+    def _resolve_spl_setid(self, generic_name: str) -> Optional[str]:
+        """Uncached setid resolution behind _get_spl_setid's memo."""
         data = self._api_get_json("v2/spls.json", {
             "drug_name": generic_name,
             "page": 1,
@@ -141,33 +217,16 @@ class DailyMedSource(DrugDataSource):
             return None
 
         name_lower = generic_name.lower().strip()
-        # Common salt forms that are equivalent to the base drug
-        salt_suffixes = [
-            "hydrochloride", "hcl", "sulfate", "sodium", "potassium",
-            "maleate", "besylate", "mesylate", "fumarate", "tartrate",
-            "succinate", "calcium", "acetate", "phosphate", "citrate",
-            "dihydrate", "anhydrous", "trihydrate",
-        ]
-        salt_forms = [f"{name_lower} {s}" for s in salt_suffixes]
-
-        # Dosage form keywords — commas within these are NOT combo indicators
-        dosage_forms = [
-            "tablet", "capsule", "solution", "injection", "cream",
-            "ointment", "powder", "suspension", "aerosol", "spray",
-            "patch", "gel", "drops", "inhaler", "suppository", "lozenge",
-            "syrup", "elixir", "emulsion", "pellet", "granule", "kit",
-        ]
-        # Words that signal the product is NOT a pharmaceutical drug
-        non_drug_words = [
-            "sanitizer", "hand wash", "antiseptic", "disinfectant",
-            "cleaning", "cosmetic", "sunscreen", "soap", "shampoo",
-            "toothpaste", "mouthwash", "deodorant",
-        ]
+        # frozenset → O(1) membership in the per-candidate scoring below
+        salt_forms = frozenset(f"{name_lower} {s}" for s in _SALT_SUFFIXES)
 
         best_setid = None
         best_score = -9999
 
-        for item in data["data"]:
+        # Shorter titles tend to be the plain single-ingredient products,
+        # so scanning them first lets the perfect-match short-circuit
+        # below fire on the first few candidates in the common case.
+        for item in sorted(data["data"], key=lambda i: len(i.get("title") or "")):
             title = (item.get("title") or "").strip()
             title_lower = title.lower()
             setid = item.get("setid")
@@ -177,7 +236,7 @@ class DailyMedSource(DrugDataSource):
             score = 0
 
             # ---- Disqualify non-pharmaceutical products ----
-            if any(nw in title_lower for nw in non_drug_words):
+            if _NON_DRUG_RE.search(title_lower):
                 score -= 500
 
             # ---- Extract the drug-name portion ----
@@ -185,27 +244,25 @@ class DailyMedSource(DrugDataSource):
             #   "DRUG NAME- dosage form [MANUFACTURER]"
             #   "DRUG NAME SALT FORM TABLET, FILM COATED [MANUFACTURER]"
             # First split off manufacturer bracket
-            mfr_split = re.split(r"\s*\[", title_lower, maxsplit=1)
+            mfr_split = _BRACKET_SPLIT_RE.split(title_lower, maxsplit=1)
             name_and_form = mfr_split[0].strip()
 
             # Split off dash-separated dosage description
-            dash_parts = re.split(r"\s*[-–]\s*", name_and_form, maxsplit=1)
+            dash_parts = _DASH_SPLIT_RE.split(name_and_form, maxsplit=1)
             drug_portion = dash_parts[0].strip()
 
             # Further isolate the drug name from dosage form words
             # e.g., "atorvastatin calcium tablet" -> "atorvastatin calcium"
             drug_name_part = drug_portion
-            for df in dosage_forms:
-                idx = drug_name_part.find(df)
-                if idx > 0:
-                    drug_name_part = drug_name_part[:idx].strip().rstrip(",").strip()
-                    break
+            df_match = _DOSAGE_FORM_RE.search(drug_name_part)
+            if df_match and df_match.start() > 0:
+                drug_name_part = drug_name_part[:df_match.start()].strip().rstrip(",").strip()
 
             # ---- Check for combination in the drug name portion only ----
             # "and" or "/" in the drug NAME part (not dosage) = combination
             is_combo = (" and " in drug_name_part or " / " in drug_name_part
                         or ("," in drug_name_part
-                            and not any(s in drug_name_part for s in salt_suffixes)))
+                            and not _SALT_RE.search(drug_name_part)))
 
             # ---- Scoring ----
             if drug_name_part == name_lower:
@@ -235,6 +292,10 @@ class DailyMedSource(DrugDataSource):
             if score > best_score:
                 best_score = score
                 best_setid = setid
+                # 310 = perfect single-ingredient match plus the
+                # short-title bonus; nothing can score higher.
+                if score >= 310:
+                    break
 
         # Only return if the best match actually seems relevant
         return best_setid if best_score > -200 else None
@@ -245,40 +306,59 @@ class DailyMedSource(DrugDataSource):
         This is the reliable way to get section content since the REST
         /sections.json endpoint currently returns HTML.
         """
+        if setid in self._sections_cache:
+            return self._sections_cache[setid]
+        sections = self._download_spl_sections(setid)
+        self._sections_cache[setid] = sections
+        return sections
+
+    def _download_spl_sections(self, setid: str) -> dict[str, str]:
+        """Uncached ZIP download + parse behind _fetch_spl_xml_sections."""
         sections: dict[str, str] = {}
         try:
-            time.sleep(SEARCH_DELAY * self.delay_scale)
             zip_url = f"https://dailymed.nlm.nih.gov/dailymed/getFile.cfm?setid={setid}&type=zip&name={setid}"
-            resp = requests.get(zip_url, timeout=45)
-            if resp.status_code != 200:
-                logger.debug("DailyMed ZIP download returned %s for setid %s", resp.status_code, setid)
-                return sections
-
-            # Parse the ZIP
-            with zipfile.ZipFile(io.BytesIO(resp.content)) as zf:
-                xml_files = [n for n in zf.namelist() if n.lower().endswith(".xml")]
-                if not xml_files:
+            # Stream the ZIP into a spooled temp file — SPL ZIPs can be tens
+            # of MB, and resp.content + BytesIO would hold two full copies
+            # in RAM. Small labels stay in the 16 MB memory spool.
+            with _get_http_session().get(zip_url, stream=True, timeout=45) as resp:
+                if not getattr(resp, "from_cache", False):
+                    time.sleep(SEARCH_DELAY * self.delay_scale)
+                if resp.status_code != 200:
+                    logger.debug("DailyMed ZIP download returned %s for setid %s", resp.status_code, setid)
                     return sections
-                with zf.open(xml_files[0]) as xf:
-                    tree = ElementTree.parse(xf)
-
-            root = tree.getroot()
-            # SPL XML uses the urn:hl7-org:v3 namespace
-            ns = {"hl7": "urn:hl7-org:v3"}
-
-            for component in root.findall(".//hl7:component/hl7:section", ns):
-                code_elem = component.find("hl7:code", ns)
-                if code_elem is None:
-                    continue
-                code = code_elem.get("code", "")
-                section_key = _SECTION_CODES.get(code)
-                if not section_key:
-                    continue
-                # Extract all text from <text> sub-element
-                text_elem = component.find("hl7:text", ns)
-                if text_elem is not None:
-                    raw_text = ElementTree.tostring(text_elem, encoding="unicode", method="text")
-                    sections[section_key] = raw_text.strip()
+
+                with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as tmp:
+                    for chunk in resp.iter_content(chunk_size=64 * 1024):
+                        tmp.write(chunk)
+                    tmp.seek(0)
+
+                    # Parse the ZIP, streaming the XML member through lxml's
+                    # iterparse — SPL labels run to multiple MB, and C-level
+                    # event parsing with element clearing keeps memory O(1)
+                    # instead of materializing the whole tree.
+                    with zipfile.ZipFile(tmp) as zf:
+                        xml_files = [n for n in zf.namelist() if n.lower().endswith(".xml")]
+                        if not xml_files:
+                            return sections
+                        with zf.open(xml_files[0]) as xf:
+                            for _, elem in etree.iterparse(xf, events=("end",), tag=_HL7_SECTION):
+                                code_elem = elem.find(_HL7_CODE)
+                                if code_elem is None:
+                                    elem.clear()
+                                    continue
+                                section_key = _SECTION_CODES.get(code_elem.get("code", ""))
+                                if section_key is None:
+                                    # Most SPL sections (ingredients,
+                                    # packaging, …) are codes we don't map
+                                    elem.clear()
+                                    continue
+                                # Extract all text from <text> sub-element
+                                text_elem = elem.find(_HL7_TEXT)
+                                if text_elem is not None:
+                                    sections[section_key] = "".join(text_elem.itertext()).strip()
+                                elem.clear()
+                                if len(sections) == len(_SECTION_CODES):
+                                    break  # every mapped section captured
 
         except zipfile.BadZipFile:
             logger.debug("DailyMed ZIP was invalid for setid %s", setid)
@@ -289,6 +369,9 @@ class DailyMedSource(DrugDataSource):
 
     def fetch_drug_data(self, generic_name: str) -> Optional[NormalizedDrugData]:
         """Fetch drug label data from DailyMed SPL XML."""
+        # Imported lazily so loading this module doesn't drag in OpenFDA
+        from app.services.drug_sources.openfda_source import _parse_interaction_text
+
         setid = self._get_spl_setid(generic_name)
         if not setid:
             return None
@@ -296,6 +379,9 @@ class DailyMedSource(DrugDataSource):
         # Fetch sections from the actual SPL XML (reliable)
         sections = self._fetch_spl_xml_sections(setid)
 
+        # One timestamp per fetch, not one per field
+        now_iso = datetime.utcnow().isoformat()
+
         if not sections:
             # Even if we can't get sections, return a minimal record
             # confirming the drug exists in DailyMed (helps verification)
@@ -304,8 +390,8 @@ class DailyMedSource(DrugDataSource):
                 source_authority="NIH/NLM",
                 source_document_title=f"DailyMed SPL – {generic_name.title()}",
                 source_url=f"https://dailymed.nlm.nih.gov/dailymed/drugInfo.cfm?setid={setid}",
-                source_year=datetime.now().year,
-                data_retrieved_at=datetime.utcnow().isoformat(),
+                source_year=_CURRENT_YEAR,
+                data_retrieved_at=now_iso,
             )
 
         # Map parsed sections to NormalizedDrugData fields
@@ -324,22 +410,22 @@ class DailyMedSource(DrugDataSource):
         if not mechanism:
             mechanism = _clean_xml_text(sections.get("clinical_pharmacology", ""))
         drug_interactions_text = _clean_xml_text(sections.get("drug_interactions", ""))
-        interactions = _parse_interaction_text(drug_interactions_text) if drug_interactions_text else []
+        interactions = _parse_interaction_text(drug_interactions_text, generic_name) if drug_interactions_text else []
         adverse = _clean_xml_text(sections.get("adverse_reactions", ""))
         overdosage = _clean_xml_text(sections.get("overdosage", ""))
         how_supplied = _clean_xml_text(sections.get("how_supplied", ""))
         administration_info = how_supplied[:3000] if how_supplied else ""
 
-        # Enrich contraindications with warnings & adverse reactions
-        if warnings and contraindications:
-            contraindications = contraindications + "\n\nWARNINGS: " + warnings[:1500]
-        elif warnings:
-            contraindications = warnings
-
-        if adverse and contraindications:
-            contraindications = contraindications + "\n\nADVERSE REACTIONS: " + adverse[:1000]
-        elif adverse:
-            contraindications = "ADVERSE REACTIONS: " + adverse
+        # Enrich contraindications with warnings & adverse reactions.
+        # Collect the pieces and join once rather than rebuilding the
+        # (potentially multi-KB) string per append.
+        parts = [contraindications] if contraindications else []
+        if warnings:
+            parts.append("WARNINGS: " + warnings[:1500] if parts else warnings)
+        if adverse:
+            prefix = "ADVERSE REACTIONS: "
+            parts.append(prefix + adverse[:1000] if parts else prefix + adverse)
+        contraindications = "\n\n".join(parts)
 
         if len(pregnancy) > 2000:
             pregnancy = pregnancy[:2000] + "..."
@@ -365,12 +451,14 @@ class DailyMedSource(DrugDataSource):
             source_authority="NIH/NLM",
             source_document_title=f"DailyMed SPL – {generic_name.title()}",
             source_url=source_url,
-            source_year=datetime.now().year,
-            data_retrieved_at=datetime.utcnow().isoformat(),
+            source_year=_CURRENT_YEAR,
+            data_retrieved_at=now_iso,
         )
 
     def fetch_interactions(self, generic_name: str) -> list[dict]:
         """Fetch interactions from DailyMed SPL DRUG INTERACTIONS section."""
+        from app.services.drug_sources.openfda_source import _parse_interaction_text
+
         setid = self._get_spl_setid(generic_name)
         if not setid:
             return []
@@ -381,4 +469,4 @@ class DailyMedSource(DrugDataSource):
             return []
 
         # Use the shared smart interaction parser
-        return _parse_interaction_text(raw)
+        return _parse_interaction_text(raw, generic_name)
@@ -9,14 +9,32 @@ community pharmacies pay to acquire prescription and OTC drugs covered
 under Medicaid. Updated weekly.
 """
 
+import heapq
 import logging
+import re
+import threading
+from functools import lru_cache
+from operator import itemgetter
 import time
-from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from typing import Optional
 
 import requests
+from cachetools import LRUCache, TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from app.services.drug_sources.base_source import DrugDataSource, NormalizedDrugData
+try:
+    # 2-5x faster than stdlib json on typical API payloads; optional so
+    # environments without the wheel still work
+    import orjson
+except ImportError:
+    orjson = None
+
+from app.services.drug_sources.base_source import (
+    DrugDataSource, NormalizedDrugData, _CURRENT_YEAR,
+)
 
 logger = logging.getLogger("clerasense.sources.nadac")
 
@@ -24,39 +42,171 @@ logger = logging.getLogger("clerasense.sources.nadac")
 NADAC_URL = "https://data.medicaid.gov/api/1/datastore/query/dfa2ab14-06c2-457a-9e36-5cb6d80f8d93/0"
 SEARCH_DELAY = 0.5
 
+# C-level key fetch for the top-K form selection
+_PRICE_KEY = itemgetter("nadac_per_unit")
+
+# Pricing units priced per dispensed count vs per mass/volume — hashed
+# membership instead of rebuilding a tuple per display line
+_COUNT_UNITS = frozenset({"EA", "EACH", "TAB", "CAP"})
+_MASS_UNITS = frozenset({"ML", "GM", "GR"})
+
+# Bound .format methods: the display loop reuses the same format specs
+# for every line, so compile the templates once.
+_LINE_COUNT_FMT = "${:.4f}/{} → ~${:.2f}–${:.2f}/month".format
+_LINE_PLAIN_FMT = "${:.4f}/{}".format
+
+# Human-facing dataset link embedded in source attribution; only the
+# drug name varies, so keep the template a module constant.
+NADAC_DATASET_URL = (
+    "https://data.medicaid.gov/dataset/dfa2ab14-06c2-457a-9e36-5cb6d80f8d93"
+    "?conditions[0][property]=ndc_description"
+    "&conditions[0][value]={name}&conditions[0][operator]=contains"
+)
+
+# Only the columns the pricing code actually reads — the datastore rows
+# carry a dozen more that would otherwise be fetched, parsed, and thrown
+# away for every record.
+_NADAC_FIELDS = (
+    "ndc_description", "pricing_unit", "nadac_per_unit",
+    "effective_date", "classification_for_rate_setting",
+    "ndc", "package_size",
+)
+
+# NADAC data updates weekly, so a day-long TTL is conservative. A hit
+# skips both the HTTP round-trip and the rate-limit sleep.
+_api_cache: TTLCache = TTLCache(maxsize=2048, ttl=86400)
+_api_cache_lock = threading.Lock()
+
+# Single-flight map: concurrent callers for the same uncached query
+# share one HTTP request instead of racing past the cold cache.
+_inflight: dict[tuple, Future] = {}
+_inflight_lock = threading.Lock()
+
+# Validator cache surviving TTL expiry: (etag, last_modified, results).
+# An expired entry revalidates with a conditional GET; a 304 reuses the
+# parsed results without shipping or decoding the body again.
+_validator_cache: LRUCache = LRUCache(maxsize=2048)
+
+# Pooled keep-alive session: a pricing sweep over hundreds of drugs hits
+# the same host, so reusing the TCP/TLS connection saves a handshake per
+# call. Retries cover the transient 5xx/429s the DKAN API occasionally
+# returns.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3, backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+    ),
+))
+# Explicit Accept-Encoding so the highly repetitive NADAC JSON (NDC
+# codes, long descriptions) travels compressed; requests decodes
+# transparently. brotli is negotiated automatically if its wheel is
+# installed.
+_SESSION.headers.update({
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+})
+
+
+@lru_cache(maxsize=1024)
+def _single_ingredient_matcher(drug_upper: str) -> re.Pattern:
+    """
+    Compiled probe for "name appears with no hyphen anywhere before it",
+    matched from the start of the description. One C-level scan replaces
+    the per-record `in` + `split` + `in` combination, and the list the
+    split allocated. Memoized per drug name.
+    """
+    return re.compile(rf"[^-]*{re.escape(drug_upper)} ")
+
+
+def _classify(records: list[dict], drug_upper: str) -> tuple[list[tuple], list[tuple]]:
+    """
+    Single extraction + partition pass over raw datastore records — the
+    one place the single-ingredient/combo split is defined for every
+    caller.
+
+    Returns (single_ingredient, combo) lists of
+    (ndc_desc, pricing_unit, unit_price, eff_date, classification, ndc,
+    pkg_size) tuples. Field extraction, the float parse, and the
+    missing-price filter all happen here once, so _format_cost_display
+    never re-walks the record dicts.
+    """
+    single: list[tuple] = []
+    combo: list[tuple] = []
+    matcher = _single_ingredient_matcher(drug_upper).match
+    for rec in records:
+        extracted = _extract(rec)
+        if extracted is None:
+            continue
+        desc_upper = extracted[0].upper()
+        # Single-ingredient: description starts with drug name, or the
+        # name appears with no hyphen before it
+        # e.g. "METFORMIN HCL 500 MG" vs "GLYBURIDE-METFORMIN 5-500 MG"
+        if desc_upper.startswith(drug_upper):
+            single.append(extracted)
+        elif matcher(desc_upper):
+            single.append(extracted)
+        else:
+            combo.append(extracted)
+    return single, combo
+
+
+def _extract(rec: dict) -> Optional[tuple]:
+    """Pull the consumed fields out of one raw record; None if unpriced."""
+    nadac_per_unit = rec.get("nadac_per_unit")
+    if not nadac_per_unit:
+        return None
+    try:
+        unit_price = float(nadac_per_unit)
+    except (ValueError, TypeError):
+        return None
+    return (
+        rec.get("ndc_description") or "",
+        rec.get("pricing_unit", ""),
+        unit_price,
+        rec.get("effective_date", ""),
+        rec.get("classification_for_rate_setting", ""),
+        rec.get("ndc", ""),
+        rec.get("package_size", ""),
+    )
+
+
+def _format_cost_display(records: list[dict], generic_name: str = "") -> dict:
+    """
+    Build rich pricing information from raw NADAC records.
+    Returns dict with display text, unit price, NDC, package, effective date.
+    generic_name is unused but kept for the existing call signature.
+    """
+    extracted = [t for t in map(_extract, records) if t is not None]
+    return _format_cost_from_extracted(extracted)
+
 
-def _format_cost_display(records: list[dict], generic_name: str) -> dict:
+def _format_cost_from_extracted(records: list[tuple]) -> dict:
     """
-    Build rich pricing information from NADAC records.
+    Build rich pricing information from extracted NADAC record tuples
+    (as produced by _classify / _extract).
     Returns dict with display text, unit price, NDC, package, effective date.
     """
     if not records:
         return {}
 
-    # Separate by pricing_unit and pick the most recent per form
+    # Separate by pricing_unit and pick the most recent per form.
+    # Recency is compared via a YYYYMMDD integer key rather than
+    # lexicographic string comparison against the stored entry.
     by_form: dict[str, dict] = {}
-    for rec in records:
-        ndc_desc = rec.get("ndc_description", "")
-        pricing_unit = rec.get("pricing_unit", "")
-        nadac_per_unit = rec.get("nadac_per_unit")
-        eff_date = rec.get("effective_date", "")
-        classification = rec.get("classification_for_rate_setting", "")
-        ndc = rec.get("ndc", "")
-        pkg_size = rec.get("package_size", "")
-
-        if not nadac_per_unit:
-            continue
-
-        try:
-            unit_price = float(nadac_per_unit)
-        except (ValueError, TypeError):
-            continue
-
+    eff_keys: dict[str, int] = {}
+    for ndc_desc, pricing_unit, unit_price, eff_date, classification, ndc, pkg_size in records:
         # Build a form key from description
         form_key = ndc_desc.lower().strip()[:80] if ndc_desc else f"form_{pricing_unit}"
 
-        existing = by_form.get(form_key)
-        if not existing or eff_date > existing.get("effective_date", ""):
+        try:
+            eff_key = int(eff_date[:4] + eff_date[5:7] + eff_date[8:10]) if eff_date else 0
+        except ValueError:
+            eff_key = 0
+        if eff_key > eff_keys.get(form_key, -1):
+            eff_keys[form_key] = eff_key
             by_form[form_key] = {
                 "ndc_description": ndc_desc,
                 "nadac_per_unit": unit_price,
@@ -71,8 +221,12 @@ def _format_cost_display(records: list[dict], generic_name: str) -> dict:
         return {}
 
     # Pick the most common / cheapest oral tablet form if available,
-    # otherwise just take all unique forms
-    forms = sorted(by_form.values(), key=lambda x: x["nadac_per_unit"])
+    # otherwise just take the cheapest unique forms. Only the 5 cheapest
+    # are ever displayed, so a bounded heap selection beats a full sort
+    # when a large-limit query returns many distinct forms.
+    forms = heapq.nsmallest(
+        5, by_form.values(), key=_PRICE_KEY
+    )
 
     # Build display text
     lines = []
@@ -83,21 +237,23 @@ def _format_cost_display(records: list[dict], generic_name: str) -> dict:
         eff = form["effective_date"]
 
         # Estimate monthly cost (30 units for daily medications)
-        if unit.upper() in ("EA", "EACH", "TAB", "CAP"):
-            monthly_low = price * 30
-            monthly_high = price * 90  # 3x for higher dosing
-            line = f"${price:.4f}/{unit} → ~${monthly_low:.2f}–${monthly_high:.2f}/month"
-        elif unit.upper() in ("ML", "GM", "GR"):
-            line = f"${price:.4f}/{unit}"
+        u = unit.upper()
+        if u in _COUNT_UNITS:
+            # Estimate 30 units/month low, 3x for higher dosing
+            line = _LINE_COUNT_FMT(price, unit, price * 30, price * 90)
         else:
-            line = f"${price:.4f}/{unit}"
+            # _MASS_UNITS and anything unrecognised share the plain form
+            line = _LINE_PLAIN_FMT(price, unit)
 
         line += f" ({desc})" if desc else ""
         lines.append(line)
 
     # Build summary
     cheapest = forms[0]["nadac_per_unit"]
-    most_expensive = forms[-1]["nadac_per_unit"] if len(forms) > 1 else cheapest
+    most_expensive = (
+        _PRICE_KEY(max(by_form.values(), key=_PRICE_KEY))
+        if len(by_form) > 1 else cheapest
+    )
 
     # Use the most recent primary record
     primary = forms[0]
@@ -112,13 +268,19 @@ def _format_cost_display(records: list[dict], generic_name: str) -> dict:
         "effective_date": primary["effective_date"],
         "classification": primary["classification"],
         "cheapest_per_unit": cheapest,
-        "forms_count": len(forms),
+        "forms_count": len(by_form),
     }
 
 
 class NADACSource(DrugDataSource):
     """Fetch real drug pricing data from CMS NADAC (Medicaid.gov)."""
 
+    # Pacing state shared across instances: sleep only for whatever is
+    # left of SEARCH_DELAY since the last real request, instead of a
+    # fixed delay before every call.
+    _last_call_ts = 0.0
+    _rate_lock = threading.Lock()
+
     def __init__(self, delay_scale: float = 1.0):
         self.delay_scale = delay_scale
 
@@ -132,8 +294,45 @@ class NADACSource(DrugDataSource):
 
     def _api_get(self, drug_name: str, limit: int = 50) -> Optional[list]:
         """Rate-limited GET to NADAC DKAN datastore API, searching by drug name."""
+        cache_key = (drug_name.upper().strip(), limit)
+        with _api_cache_lock:
+            cached = _api_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Single-flight: parallel batch workers asking for the same
+        # uncached drug share the leader's request
+        with _inflight_lock:
+            existing = _inflight.get(cache_key)
+            if existing is None:
+                leader_future: Future = Future()
+                _inflight[cache_key] = leader_future
+        if existing is not None:
+            try:
+                return existing.result(timeout=60)
+            except Exception:
+                return None
+
         try:
-            time.sleep(SEARCH_DELAY * self.delay_scale)
+            results = self._api_get_uncached(drug_name, limit, cache_key)
+            leader_future.set_result(results)
+            return results
+        finally:
+            with _inflight_lock:
+                _inflight.pop(cache_key, None)
+            if not leader_future.done():
+                leader_future.set_result(None)
+
+    def _api_get_uncached(self, drug_name: str, limit: int, cache_key: tuple) -> Optional[list]:
+        """The actual network fetch behind _api_get's caches."""
+        try:
+            with NADACSource._rate_lock:
+                wait = SEARCH_DELAY * self.delay_scale - (
+                    time.monotonic() - NADACSource._last_call_ts
+                )
+                if wait > 0:
+                    time.sleep(wait)
+                NADACSource._last_call_ts = time.monotonic()
             params = {
                 "limit": limit,
                 "offset": 0,
@@ -143,11 +342,47 @@ class NADACSource(DrugDataSource):
                 "sort": "effective_date",
                 "sort_order": "desc",
             }
-            headers = {"Accept": "application/json"}
-            resp = requests.get(NADAC_URL, params=params, headers=headers, timeout=30)
+            # Project only the columns we consume — rows without a price
+            # are filtered out downstream anyway, so there is no point
+            # shipping and parsing the rest of each record.
+            for i, field_name in enumerate(_NADAC_FIELDS):
+                params[f"properties[{i}]"] = field_name
+
+            # Revalidate an expired entry instead of refetching the body
+            # — between weekly NADAC refreshes the server answers 304
+            with _api_cache_lock:
+                validators = _validator_cache.get(cache_key)
+            headers = {}
+            if validators:
+                etag, last_modified, _ = validators
+                if etag:
+                    headers["If-None-Match"] = etag
+                if last_modified:
+                    headers["If-Modified-Since"] = last_modified
+
+            resp = _SESSION.get(NADAC_URL, params=params, headers=headers, timeout=30)
+            if resp.status_code == 400:
+                # Older DKAN deployments reject properties[] — fall back
+                # to the full-row query rather than failing the lookup
+                for i in range(len(_NADAC_FIELDS)):
+                    del params[f"properties[{i}]"]
+                resp = _SESSION.get(NADAC_URL, params=params, headers=headers, timeout=30)
+            if resp.status_code == 304 and validators:
+                results = validators[2]
+                with _api_cache_lock:
+                    _api_cache[cache_key] = results
+                return results
             if resp.status_code == 200:
-                data = resp.json()
-                return data.get("results", [])
+                data = orjson.loads(resp.content) if orjson else resp.json()
+                results = data.get("results", [])
+                # Errors are never cached, so transient failures retry
+                with _api_cache_lock:
+                    _api_cache[cache_key] = results
+                    etag = resp.headers.get("ETag")
+                    last_modified = resp.headers.get("Last-Modified")
+                    if etag or last_modified:
+                        _validator_cache[cache_key] = (etag, last_modified, results)
+                return results
             logger.warning("NADAC API returned %s: %s", resp.status_code, resp.text[:200])
             return None
         except requests.RequestException as exc:
@@ -164,59 +399,66 @@ class NADACSource(DrugDataSource):
         for rec in data:
             desc = rec.get("ndc_description", "")
             if desc:
-                # Extract drug name from description (before strength info)
-                parts = desc.split()
+                # Extract drug name from description (before strength
+                # info) — only the first token is needed, so don't split
+                # the whole string
+                parts = desc.split(maxsplit=1)
                 if parts:
                     name = parts[0].strip().title()
                     names.add(name)
         return list(names)[:limit]
 
-    def fetch_drug_data(self, generic_name: str) -> Optional[NormalizedDrugData]:
+    def _build_pricing(self, generic_name: str) -> Optional[dict]:
         """
-        Fetch NADAC pricing data for a drug.
-        Returns NormalizedDrugData with pricing fields populated.
-        Prioritises single-ingredient matches over combination products.
+        Shared fetch + classify + format step behind fetch_drug_data and
+        fetch_pricing_only: one API call, one single-ingredient/combo
+        partition, one _format_cost_display — callers that need both
+        views no longer pay for the work twice.
         """
         data = self._api_get(generic_name, limit=50)
         if not data:
             return None
 
-        # Separate single-ingredient matches from combo products
-        drug_upper = generic_name.upper().strip()
-        single_ingredient = []
-        combo = []
-        for rec in data:
-            desc = (rec.get("ndc_description") or "").upper()
-            # Single-ingredient: description starts with drug name and no hyphen before it
-            # e.g. "METFORMIN HCL 500 MG" vs "GLYBURIDE-METFORMIN 5-500 MG"
-            if desc.startswith(drug_upper):
-                single_ingredient.append(rec)
-            elif f"{drug_upper} " in desc and "-" not in desc.split(drug_upper)[0]:
-                single_ingredient.append(rec)
-            else:
-                combo.append(rec)
-
-        # Prefer single-ingredient; fall back to combos
+        # One extraction + partition pass; prefer single-ingredient
+        # matches and fall back to combos
+        single_ingredient, combo = _classify(data, generic_name.upper().strip())
         preferred = single_ingredient if single_ingredient else combo
-        pricing_info = _format_cost_display(preferred, generic_name)
+        return _format_cost_from_extracted(preferred) or None
+
+    def fetch_drug_data(self, generic_name: str) -> Optional[NormalizedDrugData]:
+        """
+        Fetch NADAC pricing data for a drug.
+        Returns NormalizedDrugData with pricing fields populated.
+        Prioritises single-ingredient matches over combination products.
+        """
+        pricing_info = self._build_pricing(generic_name)
         if not pricing_info:
             return None
+        return self.record_from_pricing(generic_name, pricing_info)
 
+    def record_from_pricing(
+        self, generic_name: str, pricing_info: dict
+    ) -> NormalizedDrugData:
+        """
+        Build a NormalizedDrugData from an already-fetched pricing dict,
+        so batch sweeps can reuse fetch_pricing_batch results without a
+        second API call per drug.
+        """
+        display_name = generic_name.title()
         display = pricing_info["display_text"]
         eff_date = pricing_info.get("effective_date", "")
 
-        # Build source year from effective date
-        try:
-            source_year = int(eff_date[:4]) if eff_date else datetime.now().year
-        except (ValueError, IndexError):
-            source_year = datetime.now().year
+        # Build source year from effective date — a digit check instead
+        # of try/except keeps malformed dates off the exception path
+        year_part = eff_date[:4]
+        source_year = int(year_part) if year_part.isdigit() else _CURRENT_YEAR
 
         # Determine generic availability from classification
         classification = pricing_info.get("classification", "").upper()
         generic_available = "G" in classification  # G = Generic in NADAC
 
         return NormalizedDrugData(
-            generic_name=generic_name.title(),
+            generic_name=display_name,
             approximate_cost=display,
             generic_available=generic_available,
             nadac_per_unit=pricing_info.get("nadac_per_unit"),
@@ -224,10 +466,10 @@ class NADACSource(DrugDataSource):
             nadac_effective_date=eff_date,
             nadac_package_description=pricing_info.get("ndc_description", ""),
             source_authority="CMS",
-            source_document_title=f"NADAC Weekly Price – {generic_name.title()}",
-            source_url=f"https://data.medicaid.gov/dataset/dfa2ab14-06c2-457a-9e36-5cb6d80f8d93?conditions[0][property]=ndc_description&conditions[0][value]={generic_name.upper()}&conditions[0][operator]=contains",
+            source_document_title=f"NADAC Weekly Price – {display_name}",
+            source_url=NADAC_DATASET_URL.format(name=generic_name.upper()),
             source_year=source_year,
-            data_retrieved_at=datetime.utcnow().isoformat(),
+            data_retrieved_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
         )
 
     def fetch_interactions(self, generic_name: str) -> list[dict]:
@@ -240,28 +482,44 @@ class NADACSource(DrugDataSource):
         building a full NormalizedDrugData. Used by ingestion service
         to enrich pricing data without a full source fetch.
         """
-        data = self._api_get(generic_name, limit=50)
-        if not data:
-            return None
-
-        # Prefer single-ingredient matches
-        drug_upper = generic_name.upper().strip()
-        single_ingredient = []
-        combo = []
-        for rec in data:
-            desc = (rec.get("ndc_description") or "").upper()
-            if desc.startswith(drug_upper):
-                single_ingredient.append(rec)
-            elif f"{drug_upper} " in desc and "-" not in desc.split(drug_upper)[0]:
-                single_ingredient.append(rec)
-            else:
-                combo.append(rec)
-
-        preferred = single_ingredient if single_ingredient else combo
-        pricing_info = _format_cost_display(preferred, generic_name)
+        pricing_info = self._build_pricing(generic_name)
         if not pricing_info:
             return None
 
         pricing_info["source_authority"] = "CMS"
-        pricing_info["source_url"] = f"https://data.medicaid.gov/dataset/dfa2ab14-06c2-457a-9e36-5cb6d80f8d93?conditions[0][property]=ndc_description&conditions[0][value]={generic_name.upper()}&conditions[0][operator]=contains"
+        pricing_info["source_url"] = NADAC_DATASET_URL.format(name=generic_name.upper())
         return pricing_info
+
+    def fetch_pricing_batch(self, names: list[str], max_workers: int = 8) -> dict[str, dict]:
+        """
+        Fetch pricing for many drugs with overlapped network waits.
+
+        NADAC calls are I/O-bound and independent, so a thread pool turns
+        a serial O(N) sweep into O(N / workers); the shared rate limiter
+        in _api_get still enforces the request spacing. Returns
+        {original_name: pricing_dict} with misses omitted.
+        """
+        unique: dict[str, str] = {}                 # upper key → first spelling
+        for name in names:
+            cleaned = name.strip()
+            if cleaned:
+                unique.setdefault(cleaned.upper(), cleaned)
+        if not unique:
+            return {}
+
+        results: dict[str, dict] = {}
+        with ThreadPoolExecutor(max_workers=min(len(unique), max_workers)) as pool:
+            futures = {
+                pool.submit(self.fetch_pricing_only, spelling): spelling
+                for spelling in unique.values()
+            }
+            for future in as_completed(futures):
+                spelling = futures[future]
+                try:
+                    pricing = future.result()
+                except Exception as exc:
+                    logger.error("NADAC batch fetch failed for '%s': %s", spelling, exc)
+                    continue
+                if pricing:
+                    results[spelling] = pricing
+        return results
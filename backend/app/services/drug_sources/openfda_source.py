@@ -9,59 +9,209 @@ Rate limit: 40 requests/minute without API key, 240/min with key.
 
 import logging
 import re
+import threading
 import time
-from datetime import datetime
+from operator import itemgetter
+from urllib.parse import quote_plus
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from typing import Optional
 
 import requests
 
-from app.services.drug_sources.base_source import DrugDataSource, NormalizedDrugData
+try:
+    # 2-5x faster than stdlib json; label payloads run to ~1MB, so the
+    # parse time is worth dodging. Optional so environments without the
+    # wheel still work.
+    import orjson
+except ImportError:
+    orjson = None
+
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.services.drug_sources.base_source import (
+    _CURRENT_YEAR,
+    DrugDataSource,
+    NormalizedDrugData,
+)
 
 logger = logging.getLogger("clerasense.sources.openfda")
 
 LABEL_URL = "https://api.fda.gov/drug/label.json"
 EVENT_URL = "https://api.fda.gov/drug/event.json"
+_DAILYMED_SEARCH = "https://dailymed.nlm.nih.gov/dailymed/search.cfm?labeltype=all&query={}"
 SEARCH_DELAY = 1.5  # seconds between requests to respect rate limits
 
+# Pooled keep-alive session shared by every adapter instance — a full
+# drug fetch makes 4+ api.fda.gov calls and adapters are created per
+# ingestion call, so module scope keeps the TLS connection warm across
+# both. Retries absorb the API's transient 429/5xx responses.
+# Concurrent sub-queries (FAERS, batch fetches) each get their own
+# pooled connection; pool_maxsize is sized so none of them block on a
+# free socket.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3, backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+    ),
+))
+
+# Shared pacing state: every api.fda.gov request goes through
+# _paced_get, which sleeps only for whatever is left of the interval
+# since the last request — fixed sleeps serialized even independent
+# calls from parallel workers. The interval itself adapts to the
+# X-RateLimit-Remaining header, so API-key deployments (240 req/min)
+# burst well past the anonymous-quota pacing; 429 backoff is handled by
+# the adapter's Retry config.
+_rate_lock = threading.Lock()
+_last_call_ts = 0.0
+_header_interval: Optional[float] = None
+
+# Verification runs re-check the same drug across sources, so the same
+# generic_name hits FAERS and the label endpoint several times per
+# process. Memoize both: FAERS summaries barely move week to week, and
+# label payloads are stable for a day easily. Keyed per lowered name /
+# query so bootstrap and verification share entries.
+_faers_cache: TTLCache = TTLCache(maxsize=2048, ttl=7 * 86400)
+_faers_cache_lock = threading.Lock()
+_label_cache: TTLCache = TTLCache(maxsize=512, ttl=86400)
+_label_cache_lock = threading.Lock()
+
+
+def _paced_get(url: str, params: dict, timeout: int, delay: float = SEARCH_DELAY):
+    """Issue a GET through the shared session at the allowed rate."""
+    global _last_call_ts, _header_interval
+    # delay carries the caller's delay_scale; apply the same scale to
+    # the header-derived interval
+    scale = delay / SEARCH_DELAY if SEARCH_DELAY else 1.0
+    with _rate_lock:
+        interval = _header_interval * scale if _header_interval is not None else delay
+        wait = interval - (time.monotonic() - _last_call_ts)
+        if wait > 0:
+            time.sleep(wait)
+        _last_call_ts = time.monotonic()
+    resp = _SESSION.get(url, params=params, timeout=timeout)
+    remaining = resp.headers.get("X-RateLimit-Remaining", "")
+    if remaining.isdigit():
+        r = int(remaining)
+        with _rate_lock:
+            if r > 60:
+                _header_interval = 0.25   # plenty of quota — burst
+            elif r > 10:
+                _header_interval = 1.0
+            else:
+                _header_interval = None   # near the limit — full pacing
+    return resp
+
+# Compiled once — _clean_text runs ~20 times per fetched label, and the
+# interaction parser re-applies its split/match patterns per segment.
+_RE_WS = re.compile(r"\s+")
+# Everything _clean_text strips, fused into one alternation so a section
+# of label text is scanned once instead of three times: HTML tags,
+# numbered section headers ("12.1 Mechanism of Action"), and standalone
+# ALL-CAPS section titles ("WARNINGS AND PRECAUTIONS").
+_RE_LABEL_NOISE = re.compile(
+    r"<[^>]+>"
+    r"|\b\d{1,2}(?:\.\d{1,2})?\s+[A-Z][A-Za-z\s,&/\-]{2,50}(?=\s[a-z]|\s[A-Z][a-z])"
+    r"|\b[A-Z]{4,}(?:\s+(?:AND|OR|IN|OF|FOR|THE|WITH)\s+[A-Z]{3,})*\b(?=\s)"
+)
+# Sentence scrapers for use_in_specific_populations
+_RE_RENAL = re.compile(r"(renal[^.]*\.(?:[^.]*\.)?)")
+_RE_HEPATIC = re.compile(r"(hepatic[^.]*\.(?:[^.]*\.)?)")
+_RE_LACTATION = re.compile(r"(lactat[^.]*\.(?:[^.]*\.)?(?:[^.]*\.)?)")
+# Combined interaction-entry scanner: finds "Warfarin:", "7.1 Metformin -",
+# "• Lithium (see Warnings)" and "Digoxin may increase..." style entries
+# in one pass over the whole section, instead of splitting into segments
+# and matching two patterns per segment. The body is captured in a
+# lookahead (zero-width) and bounded at the next entry head, so entries
+# packed into one sentence-run are all found and descriptions don't
+# bleed into the following entry.
+_ENTRY_PREFIX = r"(?:[•\-–]\s+)?(?:\d{1,2}(?:\.\d+)?\s+)?"  # bullet / section number
+_CAP_WORDS = r"[A-Z][a-zA-Z\-]{2,}(?:\s+[A-Z][a-zA-Z\-]+){0,3}"  # 1-4 capitalized words
+_VERBS = r"(?:may|can|should|is|are|has|increases?|decreases?|affects?|inhibits?|induces?|reduces?|enhances?|potentiates?)"
+_ENTRY_HEAD = rf"{_ENTRY_PREFIX}{_CAP_WORDS}(?:\s*[:\-–(]|\s+{_VERBS}\b)"
+_RE_INTERACTION = re.compile(
+    rf"(?:^|(?<=\. ))"
+    rf"{_ENTRY_PREFIX}"
+    rf"(?P<drug>{_CAP_WORDS})"
+    rf"(?:\s*[:\-–(]|(?=\s+{_VERBS}\b))"
+    rf"(?=\s*(?P<body>(?:[^.\n]|\.(?!\s+{_ENTRY_HEAD}))*\.?))",
+    re.M,
+)
+
+
+def _decode(resp: requests.Response) -> dict:
+    """Parse a JSON response body with orjson when available."""
+    return orjson.loads(resp.content) if orjson else resp.json()
+
 
 def _clean_text(text_list: list | str | None, max_len: int = 3000) -> str:
-    """Extract clean text from OpenFDA array-of-strings fields."""
+    """
+    Extract clean text from OpenFDA array-of-strings fields.
+    Called per field rather than once over a sentinel-joined blob: the
+    patterns are compiled at module scope so there is no per-call regex
+    setup to amortize, and joining fields would let the tag pattern
+    bleed across field boundaries on unclosed markup.
+    """
     if not text_list:
         return ""
     if isinstance(text_list, list):
         joined = " ".join(text_list)
     else:
         joined = str(text_list)
-    # Strip HTML tags
-    cleaned = re.sub(r"<[^>]+>", " ", joined)
-    # Collapse whitespace
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
-    # Strip ALL section headers/numbers like "12.1 Mechanism of Action", "8.1 Pregnancy"
-    # Matches patterns like "4 CONTRAINDICATIONS", "7.1 Drug Interactions", "12.1 Mechanism Of Action"
-    cleaned = re.sub(
-        r"\b\d{1,2}(?:\.\d{1,2})?\s+[A-Z][A-Za-z\s,&/\-]{2,50}(?=\s[a-z]|\s[A-Z][a-z])",
-        " ", cleaned
-    )
-    # Also strip standalone section titles in ALL-CAPS (e.g., "CONTRAINDICATIONS", "WARNINGS AND PRECAUTIONS")
-    cleaned = re.sub(r"\b[A-Z]{4,}(?:\s+(?:AND|OR|IN|OF|FOR|THE|WITH)\s+[A-Z]{3,})*\b(?=\s)", " ", cleaned)
-    # Collapse whitespace again after removals
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    # The output is capped at max_len anyway, so bound the regex scan:
+    # pathological multi-hundred-KB label sections can't burn unbounded
+    # time in the cleanup pattern
+    if len(joined) > 50_000:
+        joined = joined[:50_000]
+    # Strip tags and section headers in one pass, then collapse
+    # whitespace once
+    cleaned = _RE_LABEL_NOISE.sub(" ", joined)
+    cleaned = _RE_WS.sub(" ", cleaned).strip()
     # Truncate very long texts to keep DB reasonable
     if len(cleaned) > max_len:
         cleaned = cleaned[:max_len] + "..."
     return cleaned
 
 
+# Severity cue words in one alternation: one scan over the text instead
+# of a substring search per keyword per tier. Group names map straight
+# to the returned severity.
+_SEV_RE = re.compile(
+    r"(?P<contraindicated>contraindicated|fatal|death|do not use)"
+    r"|(?P<major>serious|severe|major|significant|avoid)"
+    r"|(?P<moderate>moderate|caution|monitor closely)",
+    re.IGNORECASE,
+)
+_SEV_RANK = {"contraindicated": 3, "major": 2, "moderate": 1}
+
+# Label fields whose presence earns a completeness bonus when scoring
+# candidate labels
+_CLINICAL_FIELDS = (
+    "contraindications", "warnings_and_cautions", "drug_interactions",
+    "adverse_reactions", "boxed_warning", "pregnancy",
+    "mechanism_of_action", "clinical_pharmacology",
+)
+
+
 def _extract_severity(text: str) -> str:
     """Heuristically assign interaction severity from description text."""
-    text_lower = text.lower()
-    if any(w in text_lower for w in ["contraindicated", "fatal", "death", "do not use"]):
-        return "contraindicated"
-    if any(w in text_lower for w in ["serious", "severe", "major", "significant", "avoid"]):
-        return "major"
-    if any(w in text_lower for w in ["moderate", "caution", "monitor closely"]):
-        return "moderate"
-    return "minor"
+    best = "minor"
+    best_rank = 0
+    # The highest tier wins regardless of word order, so keep scanning
+    # until a contraindicated cue settles it
+    for m in _SEV_RE.finditer(text):
+        rank = _SEV_RANK[m.lastgroup]
+        if rank > best_rank:
+            best, best_rank = m.lastgroup, rank
+            if rank == 3:
+                break
+    return best
 
 
 def _estimate_cost(drug_name: str, drug_class: str, route: str, generic_available: bool) -> str:
@@ -95,33 +245,50 @@ def _fetch_adverse_events(generic_name: str, delay_scale: float = 1.0) -> dict:
     """
     Fetch adverse event summary from FDA FAERS (Adverse Event Reporting System).
     Returns total count, serious count, and top reactions.
+    Results are memoized for a week per (lowered) generic name.
     """
+    cache_key = generic_name.lower().strip()
+    with _faers_cache_lock:
+        cached = _faers_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    result = _fetch_adverse_events_uncached(generic_name, delay_scale)
+    # Only keep answers that actually came back — a failed fetch should
+    # be retried, not remembered for a week
+    if result["total_count"] is not None:
+        with _faers_cache_lock:
+            _faers_cache[cache_key] = result
+    return result
+
+
+def _fetch_adverse_events_uncached(generic_name: str, delay_scale: float) -> dict:
     result = {
         "total_count": None,
         "serious_count": None,
         "top_reactions": [],
     }
-    try:
+    search_term = f'patient.drug.openfda.generic_name:"{generic_name}"'
+    delay = SEARCH_DELAY * delay_scale
+
+    def _total_count():
         # 1. Get total event count
-        time.sleep(SEARCH_DELAY * delay_scale)
-        search_term = f'patient.drug.openfda.generic_name:"{generic_name}"'
-        resp = requests.get(EVENT_URL, params={
+        resp = _paced_get(EVENT_URL, {
             "search": search_term,
             "limit": 1,
-        }, timeout=20)
+        }, timeout=20, delay=delay)
         if resp.status_code == 200:
-            data = resp.json()
+            data = _decode(resp)
             meta = data.get("meta", {}).get("results", {})
             result["total_count"] = meta.get("total", 0)
 
+    def _serious_count():
         # 2. Get serious event count (count=serious returns term:1=serious, term:2=not serious)
-        time.sleep(SEARCH_DELAY * delay_scale)
-        resp2 = requests.get(EVENT_URL, params={
+        resp2 = _paced_get(EVENT_URL, {
             "search": search_term,
             "count": "serious",
-        }, timeout=20)
+        }, timeout=20, delay=delay)
         if resp2.status_code == 200:
-            data2 = resp2.json()
+            data2 = _decode(resp2)
             # The count endpoint returns [{term: 1, count: N}] for serious=1
             for item in data2.get("results", []):
                 if str(item.get("term")) == "1":
@@ -132,22 +299,36 @@ def _fetch_adverse_events(generic_name: str, delay_scale: float = 1.0) -> dict:
                 meta2 = data2.get("meta", {}).get("results", {})
                 result["serious_count"] = meta2.get("total", 0)
 
+    def _top_reactions():
         # 3. Get top adverse reactions
-        time.sleep(SEARCH_DELAY * delay_scale)
-        resp3 = requests.get(EVENT_URL, params={
+        resp3 = _paced_get(EVENT_URL, {
             "search": search_term,
             "count": "patient.reaction.reactionmeddrapt.exact",
-        }, timeout=20)
+        }, timeout=20, delay=delay)
         if resp3.status_code == 200:
-            data3 = resp3.json()
+            data3 = _decode(resp3)
             reactions = data3.get("results", [])[:15]  # Top 15
             result["top_reactions"] = [
                 {"reaction": r.get("term", ""), "count": r.get("count", 0)}
                 for r in reactions
             ]
 
-    except Exception as exc:
-        logger.warning("FAERS adverse event fetch failed for '%s': %s", generic_name, exc)
+    # The three queries are independent, so overlap their network waits;
+    # _paced_get still spaces the actual requests to respect the rate
+    # limit, so the saving is the response time, not the pacing.
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [
+            pool.submit(fn)
+            for fn in (_total_count, _serious_count, _top_reactions)
+        ]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as exc:
+                logger.warning(
+                    "FAERS adverse event fetch failed for '%s': %s",
+                    generic_name, exc,
+                )
 
     return result
 
@@ -169,7 +350,7 @@ def _parse_effective_date(label: dict) -> tuple[str, int]:
             return date_str, year
         except (ValueError, IndexError):
             pass
-    return "", datetime.now().year
+    return "", _CURRENT_YEAR
 
 
 class OpenFDASource(DrugDataSource):
@@ -187,12 +368,22 @@ class OpenFDASource(DrugDataSource):
         return "FDA"
 
     def _api_get(self, params: dict, url: str = None) -> Optional[dict]:
-        """Make a rate-limited GET request to OpenFDA."""
+        """Make a rate-limited GET request to OpenFDA, memoized per query."""
+        cache_key = (url or LABEL_URL, tuple(sorted(params.items())))
+        with _label_cache_lock:
+            cached = _label_cache.get(cache_key)
+        if cached is not None:
+            return cached
         try:
-            time.sleep(SEARCH_DELAY * self.delay_scale)
-            resp = requests.get(url or LABEL_URL, params=params, timeout=30)
+            resp = _paced_get(
+                url or LABEL_URL, params, timeout=30,
+                delay=SEARCH_DELAY * self.delay_scale,
+            )
             if resp.status_code == 200:
-                return resp.json()
+                payload = _decode(resp)
+                with _label_cache_lock:
+                    _label_cache[cache_key] = payload
+                return payload
             if resp.status_code == 404:
                 return None
             logger.warning("OpenFDA returned %s: %s", resp.status_code, resp.text[:200])
@@ -208,6 +399,10 @@ class OpenFDASource(DrugDataSource):
         so that drug_class and other fields are specific to the queried drug.
         """
         name_lower = generic_name.lower().strip()
+        # Hoisted out of the scoring loop: the salt-form strings and
+        # match targets are the same for all 10 candidates x their names
+        salt_hcl = name_lower + " hydrochloride"
+        salt_hcl_abbrev = name_lower + " hcl"
 
         # Score each result
         scored = []
@@ -221,7 +416,7 @@ class OpenFDASource(DrugDataSource):
                 is_combo = " and " in gn or "/" in gn or "," in gn
                 if gn == name_lower:
                     score += 300  # Perfect single-ingredient match
-                elif gn == f"{name_lower} hydrochloride" or gn == f"{name_lower} hcl":
+                elif gn == salt_hcl or gn == salt_hcl_abbrev:
                     score += 280  # Salt form exact match
                 elif gn.startswith(name_lower) and not is_combo:
                     score += 200  # e.g., "metformin hydrochloride extended-release"
@@ -231,9 +426,7 @@ class OpenFDASource(DrugDataSource):
                     score -= 200  # PENALISE combo products heavily
 
             # Prefer labels with more clinical fields filled
-            for field_name in ["contraindications", "warnings_and_cautions", "drug_interactions",
-                          "adverse_reactions", "boxed_warning", "pregnancy",
-                          "mechanism_of_action", "clinical_pharmacology"]:
+            for field_name in _CLINICAL_FIELDS:
                 if label.get(field_name):
                     score += 5
 
@@ -251,7 +444,7 @@ class OpenFDASource(DrugDataSource):
 
             scored.append((score, label))
 
-        scored.sort(key=lambda x: x[0], reverse=True)
+        scored.sort(key=itemgetter(0), reverse=True)
         return scored[0][1] if scored else results[0]
 
     def search_drugs(self, query: str, limit: int = 10) -> list[str]:
@@ -283,7 +476,55 @@ class OpenFDASource(DrugDataSource):
             return None
 
         label = self._pick_best_label(data["results"], generic_name)
-        openfda = label.get("openfda", {})
+        return self._build_record(generic_name, label)
+
+    def fetch_drug_data_batch(
+        self, names: list[str], batch_size: int = 40
+    ) -> dict[str, Optional[NormalizedDrugData]]:
+        """
+        Fetch labels for many drugs with OR-batched label queries.
+
+        One search request covers up to batch_size generic names, so a
+        bootstrap sweep pays the label-query rate delay once per batch
+        instead of once per drug. FAERS enrichment still runs per drug.
+        Returns {name: NormalizedDrugData or None}.
+        """
+        results: dict[str, Optional[NormalizedDrugData]] = {}
+        clean = [n.strip() for n in names if n.strip()]
+        for start in range(0, len(clean), batch_size):
+            chunk = clean[start:start + batch_size]
+            quoted = " OR ".join(f'"{n}"' for n in chunk)
+            data = self._api_get({
+                "search": f"openfda.generic_name:({quoted})",
+                "limit": 100,
+            })
+            labels = (data or {}).get("results", [])
+
+            # Group returned labels back to the queried names
+            grouped: dict[str, list[dict]] = {}
+            for label in labels:
+                gen_names = [
+                    g.lower()
+                    for g in label.get("openfda", {}).get("generic_name", [])
+                ]
+                for name in chunk:
+                    if any(name.lower() in gn for gn in gen_names):
+                        grouped.setdefault(name, []).append(label)
+
+            for name in chunk:
+                candidates = grouped.get(name)
+                if candidates:
+                    best = self._pick_best_label(candidates, name)
+                    results[name] = self._build_record(name, best)
+                else:
+                    results[name] = None
+        return results
+
+    def _build_record(self, generic_name: str, label: dict) -> NormalizedDrugData:
+        """Normalize a picked label (plus FAERS enrichment) into a record."""
+        # Bound method once — this function does ~25 field lookups per drug
+        g = label.get
+        openfda = g("openfda", {})
 
         # Extract brand names
         brand_names = [b.strip().title() for b in openfda.get("brand_name", [])]
@@ -301,57 +542,55 @@ class OpenFDASource(DrugDataSource):
         drug_class = ", ".join(single_classes) if single_classes else ", ".join(raw_drug_classes)
 
         # Mechanism of action
-        mechanism = _clean_text(label.get("mechanism_of_action"))
+        mechanism = _clean_text(g("mechanism_of_action"))
         if not mechanism:
-            mechanism = _clean_text(label.get("clinical_pharmacology"))
+            mechanism = _clean_text(g("clinical_pharmacology"))
 
         # Indications
-        raw_indications = _clean_text(label.get("indications_and_usage"))
+        raw_indications = _clean_text(g("indications_and_usage"))
         indications = [raw_indications] if raw_indications else []
 
         # Dosage
-        adult_dosage = _clean_text(label.get("dosage_and_administration"))
-        pediatric_dosage = _clean_text(label.get("pediatric_use"))
+        adult_dosage = _clean_text(g("dosage_and_administration"))
+        pediatric_dosage = _clean_text(g("pediatric_use"))
         renal_adjustment = ""
         hepatic_adjustment = ""
 
         # Overdose information (from FDA "overdosage" section)
-        overdose_info = _clean_text(label.get("overdosage"), max_len=3000)
-
-        # Administration details (dosage forms, how supplied, storage)
-        admin_parts = []
-        dfs = _clean_text(label.get("dosage_forms_and_strengths"), max_len=1500)
-        if dfs:
-            admin_parts.append(dfs)
-        how_sup = _clean_text(label.get("how_supplied"), max_len=1500)
-        if how_sup:
-            admin_parts.append(how_sup)
-        storage = _clean_text(label.get("storage_and_handling"), max_len=800)
-        if storage:
-            admin_parts.append("Storage & Handling: " + storage)
-        administration_info = "\n\n".join(admin_parts)
-
-        # Try to extract renal/hepatic from dosage text or use-in-specific-populations
-        specific_populations = _clean_text(label.get("use_in_specific_populations"))
-        if specific_populations:
-            sp_lower = specific_populations.lower()
+        overdose_info = _clean_text(g("overdosage"), max_len=3000)
+
+        # Administration details (dosage forms, how supplied, storage);
+        # join drops the empty sections itself
+        storage = _clean_text(g("storage_and_handling"), max_len=800)
+        administration_info = "\n\n".join(filter(None, (
+            _clean_text(g("dosage_forms_and_strengths"), max_len=1500),
+            _clean_text(g("how_supplied"), max_len=1500),
+            "Storage & Handling: " + storage if storage else "",
+        )))
+
+        # Try to extract renal/hepatic from dosage text or use-in-specific-populations.
+        # Lower-case once — the renal/hepatic and lactation scrapers below
+        # all work on the same lowered view.
+        specific_populations = _clean_text(g("use_in_specific_populations"))
+        sp_lower = specific_populations.lower() if specific_populations else ""
+        if sp_lower:
             if "renal" in sp_lower:
-                renal_match = re.search(r"(renal[^.]*\.(?:[^.]*\.)?)", sp_lower)
+                renal_match = _RE_RENAL.search(sp_lower)
                 if renal_match:
                     renal_adjustment = renal_match.group(0).strip().capitalize()
             if "hepatic" in sp_lower or "liver" in sp_lower:
-                hepatic_match = re.search(r"(hepatic[^.]*\.(?:[^.]*\.)?)", sp_lower)
+                hepatic_match = _RE_HEPATIC.search(sp_lower)
                 if hepatic_match:
                     hepatic_adjustment = hepatic_match.group(0).strip().capitalize()
 
         # Safety — use warnings_and_cautions (OpenFDA uses this field, NOT "warnings")
-        contraindications = _clean_text(label.get("contraindications"))
-        black_box = _clean_text(label.get("boxed_warning"))
+        contraindications = _clean_text(g("contraindications"))
+        black_box = _clean_text(g("boxed_warning"))
 
         # Warnings: prefer warnings_and_cautions over warnings
-        warnings_text = _clean_text(label.get("warnings_and_cautions"))
+        warnings_text = _clean_text(g("warnings_and_cautions"))
         if not warnings_text:
-            warnings_text = _clean_text(label.get("warnings"))
+            warnings_text = _clean_text(g("warnings"))
         # Append warnings to contraindications for richer safety data
         if warnings_text and not contraindications:
             contraindications = warnings_text
@@ -359,21 +598,21 @@ class OpenFDASource(DrugDataSource):
             contraindications = contraindications + "\n\nADDITIONAL WARNINGS: " + warnings_text[:1500]
 
         # Adverse reactions
-        adverse_reactions = _clean_text(label.get("adverse_reactions"), max_len=2000)
+        adverse_reactions = _clean_text(g("adverse_reactions"), max_len=2000)
         if adverse_reactions and contraindications:
             contraindications = contraindications + "\n\nADVERSE REACTIONS: " + adverse_reactions[:1000]
         elif adverse_reactions:
             contraindications = "ADVERSE REACTIONS: " + adverse_reactions
 
         # Pregnancy & lactation — truncate to fit DB
-        pregnancy_risk = _clean_text(label.get("pregnancy"), max_len=2000)
+        pregnancy_risk = _clean_text(g("pregnancy"), max_len=2000)
         if not pregnancy_risk:
-            pregnancy_risk = _clean_text(label.get("teratogenic_effects"), max_len=2000)
-        lactation_risk = _clean_text(label.get("nursing_mothers"), max_len=2000)
+            pregnancy_risk = _clean_text(g("teratogenic_effects"), max_len=2000)
+        lactation_risk = _clean_text(g("nursing_mothers"), max_len=2000)
         if not lactation_risk:
             # Try use_in_specific_populations for lactation info
-            if specific_populations and "lactat" in specific_populations.lower():
-                lact_match = re.search(r"(lactat[^.]*\.(?:[^.]*\.)?(?:[^.]*\.)?)", specific_populations.lower())
+            if "lactat" in sp_lower:
+                lact_match = _RE_LACTATION.search(sp_lower)
                 if lact_match:
                     lactation_risk = lact_match.group(0).strip().capitalize()
 
@@ -397,11 +636,7 @@ class OpenFDASource(DrugDataSource):
         # set-id values are frequently stale/expired and redirect to the
         # DailyMed homepage.  The verification service will upgrade this to a
         # direct drug-page URL using the DailyMed adapter's validated setid.
-        import urllib.parse
-        source_url = (
-            "https://dailymed.nlm.nih.gov/dailymed/search.cfm?labeltype=all&query="
-            + urllib.parse.quote_plus(generic_name)
-        )
+        source_url = _DAILYMED_SEARCH.format(quote_plus(generic_name))
 
         # Extract effective date from label
         effective_date, source_year = _parse_effective_date(label)
@@ -410,8 +645,8 @@ class OpenFDASource(DrugDataSource):
         faers = _fetch_adverse_events(generic_name, self.delay_scale)
 
         # Extract interactions from the already-fetched label (avoids re-fetching)
-        raw_interactions = _clean_text(label.get("drug_interactions"))
-        interactions = _parse_interaction_text(raw_interactions) if raw_interactions else []
+        raw_interactions = _clean_text(g("drug_interactions"))
+        interactions = _parse_interaction_text(raw_interactions, generic_name) if raw_interactions else []
 
         return NormalizedDrugData(
             generic_name=generic_name.title(),
@@ -440,7 +675,7 @@ class OpenFDASource(DrugDataSource):
             source_url=source_url,
             source_year=source_year,
             effective_date=effective_date,
-            data_retrieved_at=datetime.utcnow().isoformat(),
+            data_retrieved_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
         )
 
     def fetch_interactions(self, generic_name: str) -> list[dict]:
@@ -458,7 +693,7 @@ class OpenFDASource(DrugDataSource):
         if not raw:
             return []
 
-        return _parse_interaction_text(raw)
+        return _parse_interaction_text(raw, generic_name)
 
 
 # ---- Shared interaction-text parser ----
@@ -482,99 +717,76 @@ _NON_DRUG_WORDS = frozenset(w.lower() for w in [
 ])
 
 
-def _parse_interaction_text(raw: str) -> list[dict]:
+def _parse_interaction_text(raw: str, subject_name: str = "") -> list[dict]:
     """
     Parse FDA / DailyMed drug-interaction free-text into structured entries.
-    Uses a smarter heuristic:
-      1. Split on bullet / numbered-list patterns and bold-like headers.
-      2. Extract the first capitalized multi-letter word that is NOT in the
-         blacklist — that is likely the interacting drug.
-      3. If no valid drug name is found, skip the segment entirely.
+    A single scan with the combined pattern finds every "DrugName: ..." /
+    "DrugName may ..." entry; candidate names are then vetted against the
+    non-drug blacklist, so false headers are skipped rather than parsed.
+
+    subject_name is the drug whose label is being parsed — its own name
+    appears throughout the interaction section ("...may increase
+    metformin exposure") and must never be emitted as an interacting
+    drug.
     """
     interactions: list[dict] = []
+    subject_lower = subject_name.strip().lower()
     seen_drugs: set[str] = set()
 
-    # Split into segments using common label delimiters:
-    #   • Numbered items: "7.1 Metformin", "• Warfarin", "- Lithium"
-    #   • Lines starting with a capitalized drug-like word followed by colon/dash
-    segments = re.split(
-        r"(?:(?<=\n)|(?<=\. ))(?=(?:\d{1,2}(?:\.\d+)?\s+)?[A-Z][a-z])",
-        raw,
-    )
-
-    # Also try splitting on bullet-style patterns
-    if len(segments) <= 2:
-        segments = re.split(r"[•\-–]\s+", raw)
-
-    for segment in segments:
-        segment = segment.strip()
-        if len(segment) < 15:
-            continue
-
-        # Try to extract drug name: first capitalized word/phrase not in blacklist
-        # Patterns: "Warfarin:", "Metformin -", "Lithium (see Warnings)", "ACE Inhibitors"
-        drug_match = re.match(
-            r"(?:\d{1,2}(?:\.\d+)?\s+)?"          # optional section number
-            r"([A-Z][a-zA-Z\-]+(?:\s+[A-Z][a-zA-Z\-]+){0,3})"  # 1-4 capitalized words
-            r"\s*[:\-–(]",                          # followed by separator
-            segment,
-        )
-        if not drug_match:
-            # Try without separator — just capitalized word(s) at start
-            drug_match = re.match(
-                r"(?:\d{1,2}(?:\.\d+)?\s+)?"
-                r"([A-Z][a-zA-Z\-]+(?:\s+[A-Z][a-zA-Z\-]+){0,2})"
-                r"\s+(?:may|can|should|is|are|has|increases?|decreases?|affects?|inhibits?|induces?|reduces?|enhances?|potentiates?)\b",
-                segment,
-            )
-
-        if not drug_match:
-            continue
-
-        drug_name = drug_match.group(1).strip()
-        # Validate: skip if ALL words are in the blacklist
-        name_words = drug_name.split()
-        valid_words = [w for w in name_words if w.lower() not in _NON_DRUG_WORDS]
-        if not valid_words:
-            continue
-        # Rebuild drug name from valid words
-        drug_name = " ".join(name_words)  # keep original casing
-
-        # Skip very short or already-seen
-        if len(drug_name) < 3:
+    for m in _RE_INTERACTION.finditer(raw):
+        drug_name = m.group("drug").strip()
+        # Validate: skip if ALL words are in the blacklist — short-
+        # circuits on the first non-blacklisted word
+        if all(w.lower() in _NON_DRUG_WORDS for w in drug_name.split()):
             continue
         name_key = drug_name.lower()
-        if name_key in seen_drugs:
+        if name_key == subject_lower or name_key in seen_drugs:
             continue
         seen_drugs.add(name_key)
 
-        # Build description from the rest of the segment
-        desc = segment[drug_match.end():].strip(" :-–")
-        if not desc:
-            desc = segment
-        desc = desc[:500]
-
+        # Build description from the lookahead-captured body
+        body = m.group("body").strip(" :-–")
+        segment = drug_name + " " + body
         interactions.append({
             "interacting_drug": drug_name,
             "severity": _extract_severity(segment),
-            "description": desc,
+            "description": (body or segment)[:500],
         })
-
-    return interactions[:20]  # Cap at 20 interactions
-
-
-def get_fda_drug_list(skip: int = 0, limit: int = 100) -> list[str]:
-    """
-    Return a curated list of the most commonly prescribed drugs for
-    initial discovery.  The previous approach (using OpenFDA
-    ``count=openfda.generic_name.exact``) returned alphabetically,
-    which was dominated by OTC/cosmetic products.  This curated list
-    ensures that the bootstrap populates clinically important drugs first.
-
-    The list is based on the 100 most dispensed prescription medications
-    in the United States (CMS / IQVIA / GoodRx publicly available data).
-    """
-    CURATED_DRUGS = [
+        if len(interactions) == 20:  # Cap at 20 interactions
+            break
+
+    # Second pass: one linear scan for curated drug names the head
+    # heuristic missed — names buried mid-sentence never match the
+    # "Capitalized word + separator/verb" entry pattern but are known
+    # drugs with certainty, so recall them with their trailing context.
+    if len(interactions) < 20:
+        for m in _KNOWN_DRUG_RE.finditer(raw):
+            name_key = m.group(0).lower()
+            if name_key == subject_lower or name_key in seen_drugs:
+                continue
+            seen_drugs.add(name_key)
+            # Bound the description to the sentence(s) around the match
+            # (within a 300-char window either way) so it doesn't start
+            # mid-sentence or bleed into adjacent entries.
+            start = raw.rfind(". ", max(0, m.start() - 300), m.start())
+            start = start + 2 if start != -1 else max(0, m.start() - 300)
+            end = raw.find(". ", m.end(), m.end() + 300)
+            end = end + 1 if end != -1 else min(len(raw), m.end() + 300)
+            context = raw[start:end].strip()
+            interactions.append({
+                "interacting_drug": m.group(0),
+                "severity": _extract_severity(context),
+                "description": context[:500],
+            })
+            if len(interactions) == 20:
+                break
+
+    return interactions
+
+
+# The list is based on the 100 most dispensed prescription medications
+# in the United States (CMS / IQVIA / GoodRx publicly available data).
+CURATED_DRUGS = [
         # Cardiovascular
         "Lisinopril", "Amlodipine", "Atorvastatin", "Losartan", "Metoprolol",
         "Hydrochlorothiazide", "Simvastatin", "Rosuvastatin", "Pravastatin",
@@ -614,15 +826,37 @@ def get_fda_drug_list(skip: int = 0, limit: int = 100) -> list[str]:
         "Tamsulosin", "Finasteride", "Sildenafil", "Tadalafil",
         "Latanoprost", "Timolol", "Cyclosporine",
         "Allopurinol", "Colchicine", "Methotrexate",
-    ]
-    # Deduplicate while preserving order
-    seen = set()
-    unique: list[str] = []
-    for d in CURATED_DRUGS:
-        key = d.lower()
-        if key not in seen:
-            seen.add(key)
-            unique.append(d)
-
-    # Apply pagination
-    return unique[skip:skip + limit]
+]
+
+# Deduplicated once at import (case-insensitively, first spelling wins,
+# order preserved) — paged discovery calls get_fda_drug_list repeatedly
+# for a constant list
+_dedup: dict[str, str] = {}
+for _d in CURATED_DRUGS:
+    _dedup.setdefault(_d.lower(), _d)
+_CURATED_DRUGS_UNIQUE = list(_dedup.values())
+del _dedup
+
+
+# One compiled alternation over the curated vocabulary is the stdlib
+# stand-in for an Aho-Corasick automaton: re scans the text once at C
+# level for all known names. Longest-first so "Insulin Glargine" wins
+# over a shorter overlapping name.
+_KNOWN_DRUG_RE = re.compile(
+    r"\b(?:" + "|".join(
+        re.escape(d) for d in sorted(_CURATED_DRUGS_UNIQUE, key=len, reverse=True)
+    ) + r")\b",
+    re.IGNORECASE,
+)
+
+
+def get_fda_drug_list(skip: int = 0, limit: int = 100) -> list[str]:
+    """
+    Return a curated list of the most commonly prescribed drugs for
+    initial discovery.  The previous approach (using OpenFDA
+    ``count=openfda.generic_name.exact``) returned alphabetically,
+    which was dominated by OTC/cosmetic products.  This curated list
+    ensures that the bootstrap populates clinically important drugs first.
+    """
+    # Apply pagination over the deduplicated constant
+    return _CURATED_DRUGS_UNIQUE[skip:skip + limit]
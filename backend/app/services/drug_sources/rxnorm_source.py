@@ -12,19 +12,90 @@ RxNorm's primary value is drug classification and nomenclature.
 """
 
 import logging
+import threading
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from typing import Optional
 
 import requests
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from app.services.drug_sources.base_source import DrugDataSource, NormalizedDrugData
+from app.services.drug_sources.base_source import (
+    _CURRENT_YEAR,
+    DrugDataSource,
+    NormalizedDrugData,
+)
 
 logger = logging.getLogger("clerasense.sources.rxnorm")
 
 RXNORM_BASE = "https://rxnav.nlm.nih.gov/REST"
 SEARCH_DELAY = 0.5
 
+# Class names containing these denote combination products, which make
+# poor primary drug classes
+_COMBO_HINTS = ("combination", " and ", " with ")
+
+# Pooled keep-alive session shared by every adapter instance — a single
+# drug fetch issues 5+ rxnav.nlm.nih.gov calls, so reusing the TLS
+# connection drops the per-call handshake. Retries absorb the API's
+# transient 429/5xx responses, matching the other source adapters.
+# The pool is sized so the thread-pooled fan-outs below never block
+# waiting for a free connection.
+_SESSION = requests.Session()
+_SESSION.headers["Accept"] = "application/json"
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=3, backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+    ),
+))
+
+
+class _TokenBucket:
+    """
+    Token-bucket limiter: bursts are free up to capacity, then requests
+    smooth out to the refill rate. RxNav's documented limit is 20
+    requests/second, so short fan-outs never sleep at all while
+    sustained crawls settle at the allowed rate.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity,
+                self.tokens + (now - self.last_refill) * self.refill_rate,
+            )
+            self.last_refill = now
+            # Deduct immediately; a negative balance is repaid by the
+            # sleep below, outside the lock
+            self.tokens -= tokens
+            wait = -self.tokens / self.refill_rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+# One bucket per process — all adapter instances talk to the same host
+_bucket = _TokenBucket(capacity=20, refill_rate=20.0)
+
+# RxNorm answers for a given query are effectively immutable within a
+# session, and the same rxcui is re-queried by search_drugs and
+# fetch_drug_data. Cache hits skip the HTTP call and the token bucket.
+_api_cache: TTLCache = TTLCache(maxsize=4096, ttl=86400)
+_api_cache_lock = threading.Lock()
+
 
 class RxNormSource(DrugDataSource):
     """Fetch drug classification and nomenclature data from NIH RxNorm/RxNav."""
@@ -41,19 +112,26 @@ class RxNormSource(DrugDataSource):
         return "NIH/NLM"
 
     def _api_get(self, url: str, params: dict = None) -> Optional[dict]:
-        """Rate-limited GET request."""
+        """Rate-limited GET request, memoized per query for a day."""
+        cache_key = (url, tuple(sorted(params.items())) if params else ())
+        with _api_cache_lock:
+            cached = _api_cache.get(cache_key)
+        if cached is not None:
+            return cached
         try:
-            time.sleep(SEARCH_DELAY * self.delay_scale)
-            resp = requests.get(url, params=params or {}, timeout=30)
+            # Scaled-up callers consume more of the budget per request
+            _bucket.acquire(self.delay_scale)
+            resp = _SESSION.get(url, params=params or {}, timeout=30)
             if resp.status_code == 200:
-                ct = resp.headers.get("Content-Type", "")
-                if "json" in ct or "javascript" in ct:
-                    return resp.json()
-                # Try parsing as JSON anyway (some responses lack proper Content-Type)
+                # Parse as JSON regardless of Content-Type — some RxNav
+                # responses lack a proper one
                 try:
-                    return resp.json()
+                    data = resp.json()
                 except Exception:
                     return None
+                with _api_cache_lock:
+                    _api_cache[cache_key] = data
+                return data
             return None
         except requests.RequestException as exc:
             logger.error("RxNorm request failed: %s", exc)
@@ -82,16 +160,23 @@ class RxNormSource(DrugDataSource):
             return []
 
         candidates = data.get("approximateGroup", {}).get("candidate", [])
+        rxcuis = [c["rxcui"] for c in candidates if c.get("rxcui")]
         names = set()
-        for c in candidates:
-            rxcui = c.get("rxcui")
-            if rxcui:
-                name_data = self._api_get(f"{RXNORM_BASE}/rxcui/{rxcui}/properties.json")
-                if name_data:
-                    props = name_data.get("properties", {})
-                    name = props.get("name", "").strip().title()
-                    if name and len(name) > 2:
-                        names.add(name)
+        if rxcuis:
+            # The per-candidate properties lookups are independent —
+            # fan them out; the shared token bucket keeps the aggregate
+            # request rate within RxNav's limit
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                for name_data in pool.map(
+                    lambda rxcui: self._api_get(
+                        f"{RXNORM_BASE}/rxcui/{rxcui}/properties.json"),
+                    rxcuis,
+                ):
+                    if name_data:
+                        props = name_data.get("properties", {})
+                        name = props.get("name", "").strip().title()
+                        if name and len(name) > 2:
+                            names.add(name)
         return list(names)[:limit]
 
     def fetch_drug_data(self, generic_name: str) -> Optional[NormalizedDrugData]:
@@ -106,19 +191,34 @@ class RxNormSource(DrugDataSource):
         if not rxcui:
             return None
 
-        # Get properties
-        props_data = self._api_get(f"{RXNORM_BASE}/rxcui/{rxcui}/properties.json")
+        # The four follow-up queries only depend on the rxcui, so fan
+        # them out and overlap their round-trips; _api_get still spaces
+        # the request starts. Only the MESH class fallback stays
+        # sequential, since whether it runs depends on the ATC answer.
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            props_future = pool.submit(
+                self._api_get, f"{RXNORM_BASE}/rxcui/{rxcui}/properties.json")
+            related_future = pool.submit(
+                self._api_get, f"{RXNORM_BASE}/rxcui/{rxcui}/related.json",
+                {"tty": "BN"})  # Brand Name
+            allrelated_future = pool.submit(
+                self._api_get, f"{RXNORM_BASE}/rxcui/{rxcui}/allrelated.json")
+            class_future = pool.submit(
+                self._api_get, f"{RXNORM_BASE}/rxclass/class/byRxcui.json",
+                {"rxcui": rxcui, "relaSource": "ATC"})
+            props_data = props_future.result()
+            related_data = related_future.result()
+            all_related = allrelated_future.result()
+            class_data = class_future.result()
+
         if not props_data:
             return None
 
         props = props_data.get("properties", {})
         normalized_name = props.get("name", generic_name).strip().title()
 
-        # Get brand names (related brands)
+        # Brand names (related brands)
         brand_names = []
-        related_data = self._api_get(f"{RXNORM_BASE}/rxcui/{rxcui}/related.json", {
-            "tty": "BN",  # Brand Name
-        })
         if related_data:
             for group in related_data.get("relatedGroup", {}).get("conceptGroup", []):
                 for prop in group.get("conceptProperties", []):
@@ -129,7 +229,6 @@ class RxNormSource(DrugDataSource):
         # Determine generic availability: if there are SBD (Semantic Branded Drug)
         # AND SCD (Semantic Clinical Drug) entries, generic exists
         generic_available = False
-        all_related = self._api_get(f"{RXNORM_BASE}/rxcui/{rxcui}/allrelated.json")
         if all_related:
             groups = all_related.get("allRelatedGroup", {}).get("conceptGroup", [])
             ttys = {g.get("tty") for g in groups if g.get("conceptProperties")}
@@ -137,29 +236,27 @@ class RxNormSource(DrugDataSource):
             if "SCD" in ttys or "GPCK" in ttys:
                 generic_available = True
 
-        # Get drug class via RxClass
+        # Drug class via RxClass (ATC answer from the fan-out above)
         drug_class = ""
-        combo_hints = ["combination", " and ", " with "]
-        class_data = self._api_get(f"{RXNORM_BASE}/rxclass/class/byRxcui.json", {
-            "rxcui": rxcui,
-            "relaSource": "ATC",
-        })
+        first_combo = ""
         if class_data:
             classes = class_data.get("rxclassDrugInfoList", {}).get("rxclassDrugInfo", [])
-            # Prefer a class that is NOT about combinations
-            single_classes = []
-            combo_classes = []
+            # Prefer a class that is NOT about combinations; stop at the
+            # first one, keeping the first combo class as fallback
             for c in classes:
                 name = c.get("rxclassMinConceptItem", {}).get("className", "")
-                if name:
-                    if any(kw in name.lower() for kw in combo_hints):
-                        combo_classes.append(name)
-                    else:
-                        single_classes.append(name)
-            drug_class = single_classes[0] if single_classes else (combo_classes[0] if combo_classes else "")
+                if not name:
+                    continue
+                if any(kw in name.lower() for kw in _COMBO_HINTS):
+                    if not first_combo:
+                        first_combo = name
+                else:
+                    drug_class = name
+                    break
+            drug_class = drug_class or first_combo
 
         # If ATC didn't work or returned a combo class, try MeSH
-        if not drug_class or any(kw in drug_class.lower() for kw in combo_hints):
+        if not drug_class or any(kw in drug_class.lower() for kw in _COMBO_HINTS):
             class_data = self._api_get(f"{RXNORM_BASE}/rxclass/class/byRxcui.json", {
                 "rxcui": rxcui,
                 "relaSource": "MESH",
@@ -168,7 +265,7 @@ class RxNormSource(DrugDataSource):
                 classes = class_data.get("rxclassDrugInfoList", {}).get("rxclassDrugInfo", [])
                 for c in classes:
                     name = c.get("rxclassMinConceptItem", {}).get("className", "")
-                    if name and not any(kw in name.lower() for kw in combo_hints):
+                    if name and not any(kw in name.lower() for kw in _COMBO_HINTS):
                         drug_class = name
                         break
 
@@ -180,8 +277,8 @@ class RxNormSource(DrugDataSource):
             source_authority="NIH/NLM",
             source_document_title=f"RxNorm Drug Concept – {normalized_name} (RXCUI: {rxcui})",
             source_url=f"https://mor.nlm.nih.gov/RxNav/search?searchBy=RXCUI&searchTerm={rxcui}",
-            source_year=datetime.now().year,
-            data_retrieved_at=datetime.utcnow().isoformat(),
+            source_year=_CURRENT_YEAR,
+            data_retrieved_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
         )
 
     def fetch_interactions(self, generic_name: str) -> list[dict]:
@@ -4,8 +4,13 @@ Uses OpenAI's embedding API. API key loaded from environment only.
 """
 
 import logging
+import threading
+from typing import Optional
+
 import numpy as np
 from openai import OpenAI
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 
 from app.config import Config
 from app.database import db
@@ -13,6 +18,10 @@ from app.models.models import Embedding, Drug
 
 logger = logging.getLogger("clerasense.embeddings")
 
+# Drugs embedded per API call during bulk indexing; the endpoint accepts
+# arrays, so one request replaces a round-trip per drug.
+EMBED_BATCH_SIZE = 128
+
 _client = None
 
 
@@ -35,10 +44,23 @@ def generate_embedding(text: str) -> list[float]:
     return resp.data[0].embedding
 
 
+def generate_embeddings_batch(texts: list[str]) -> list[list[float]]:
+    """Generate embedding vectors for many texts in a single API call."""
+    if not texts:
+        return []
+    client = _get_client()
+    resp = client.embeddings.create(
+        input=texts,
+        model=Config.EMBEDDING_MODEL_NAME,
+    )
+    # Order by the returned index rather than trusting response order
+    return [d.embedding for d in sorted(resp.data, key=lambda d: d.index)]
+
+
 def cosine_similarity(a: list[float], b: list[float]) -> float:
     """Compute cosine similarity between two vectors."""
-    a_arr = np.array(a)
-    b_arr = np.array(b)
+    a_arr = np.asarray(a, dtype=np.float32)
+    b_arr = np.asarray(b, dtype=np.float32)
     dot = np.dot(a_arr, b_arr)
     norm = np.linalg.norm(a_arr) * np.linalg.norm(b_arr)
     if norm == 0:
@@ -46,61 +68,156 @@ def cosine_similarity(a: list[float], b: list[float]) -> float:
     return float(dot / norm)
 
 
+def normalize(v: list[float] | np.ndarray) -> np.ndarray:
+    """Return v as a unit-length float32 vector (zero vectors pass through)."""
+    arr = np.asarray(v, dtype=np.float32)
+    norm = np.linalg.norm(arr)
+    return arr / norm if norm else arr
+
+
+def batch_cosine(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity of every matrix row against query in one BLAS
+    call. Both sides must already be unit-length (see normalize); the
+    float32 matrix halves the bytes moved versus per-row float64 math.
+    """
+    return matrix @ query
+
+
+# In-memory vector index: the normalized drug-embedding matrix and its
+# entity ids, loaded from the embeddings table on first search and
+# rebuilt lazily after indexing writes. At this catalog's scale one
+# resident float32 matrix answers top-K with a single matmul, which is
+# the same shape of win an external ANN index would buy at millions of
+# rows.
+_index_lock = threading.Lock()
+_index: Optional[tuple[np.ndarray, list[int]]] = None
+
+
+def get_drug_index() -> Optional[tuple[np.ndarray, list[int]]]:
+    """
+    Return (normalized float32 matrix, entity_ids) for all drug
+    embeddings, or None when nothing is indexed yet. Cached per process;
+    call invalidate_drug_index() after writing embeddings.
+    """
+    global _index
+    with _index_lock:
+        if _index is not None:
+            return _index
+        rows = db.session.execute(
+            select(Embedding.entity_id, Embedding.embedding).where(
+                Embedding.entity_type == "drug",
+                Embedding.field_name == "full_profile",
+            )
+        ).all()
+        if not rows:
+            return None
+        matrix = np.asarray([vec for _, vec in rows], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0.0] = 1.0
+        matrix /= norms[:, None]
+        _index = (matrix, [entity_id for entity_id, _ in rows])
+        return _index
+
+
+def invalidate_drug_index() -> None:
+    """Drop the cached index so the next search reloads fresh rows."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
 def build_drug_text(drug: Drug) -> str:
     """Concatenate all drug fields into a single searchable text block."""
-    parts = [
-        f"Drug: {drug.generic_name}",
-        f"Brand names: {', '.join(drug.brand_names or [])}",
-        f"Class: {drug.drug_class or ''}",
-        f"Mechanism: {drug.mechanism_of_action or ''}",
-    ]
+    parts = [f"Drug: {drug.generic_name}"]
+
+    def add(label: str, value) -> None:
+        # Skip empty fields before interpolating, instead of formatting
+        # "Label: " lines only to filter them out at the end
+        if value and str(value).strip():
+            parts.append(f"{label}: {value}")
+
+    add("Brand names", ", ".join(drug.brand_names or []))
+    add("Class", drug.drug_class)
+    add("Mechanism", drug.mechanism_of_action)
     for ind in drug.indications:
-        parts.append(f"Indication: {ind.approved_use}")
+        add("Indication", ind.approved_use)
     for dg in drug.dosage_guidelines:
-        parts.append(f"Adult dosage: {dg.adult_dosage or ''}")
-        parts.append(f"Pediatric dosage: {dg.pediatric_dosage or ''}")
-        parts.append(f"Renal adjustment: {dg.renal_adjustment or ''}")
-        parts.append(f"Hepatic adjustment: {dg.hepatic_adjustment or ''}")
-        parts.append(f"Overdose information: {dg.overdose_info or ''}")
-        parts.append(f"Underdose / missed dose: {dg.underdose_info or ''}")
-        parts.append(f"Administration details: {dg.administration_info or ''}")
+        add("Adult dosage", dg.adult_dosage)
+        add("Pediatric dosage", dg.pediatric_dosage)
+        add("Renal adjustment", dg.renal_adjustment)
+        add("Hepatic adjustment", dg.hepatic_adjustment)
+        add("Overdose information", dg.overdose_info)
+        add("Underdose / missed dose", dg.underdose_info)
+        add("Administration details", dg.administration_info)
     for sw in drug.safety_warnings:
-        parts.append(f"Contraindications: {sw.contraindications or ''}")
-        parts.append(f"Black box warnings: {sw.black_box_warnings or ''}")
-        parts.append(f"Pregnancy risk: {sw.pregnancy_risk or ''}")
-        parts.append(f"Lactation risk: {sw.lactation_risk or ''}")
+        add("Contraindications", sw.contraindications)
+        add("Black box warnings", sw.black_box_warnings)
+        add("Pregnancy risk", sw.pregnancy_risk)
+        add("Lactation risk", sw.lactation_risk)
     for ix in drug.interactions:
-        parts.append(f"Interaction with {ix.interacting_drug}: {ix.severity} – {ix.description}")
+        add(f"Interaction with {ix.interacting_drug}", f"{ix.severity} – {ix.description}")
 
-    return "\n".join(p for p in parts if p.strip())
+    return "\n".join(parts)
 
 
 def index_all_drugs():
     """Generate and cache embeddings for all drugs in the database."""
-    drugs = Drug.query.all()
-    count = 0
+    # Eager-load everything build_drug_text walks — lazy loading would
+    # issue four extra queries per drug
+    drugs = Drug.query.options(
+        selectinload(Drug.indications),
+        selectinload(Drug.dosage_guidelines),
+        selectinload(Drug.safety_warnings),
+        selectinload(Drug.interactions),
+    ).all()
+
+    # One query for everything already indexed instead of one per drug
+    existing_ids = {
+        entity_id
+        for (entity_id,) in db.session.execute(
+            select(Embedding.entity_id).where(
+                Embedding.entity_type == "drug",
+                Embedding.field_name == "full_profile",
+            )
+        )
+    }
+
+    pending = []
     for drug in drugs:
-        text = build_drug_text(drug)
-        existing = Embedding.query.filter_by(
-            entity_type="drug", entity_id=drug.id, field_name="full_profile"
-        ).first()
-        if existing:
+        if drug.id in existing_ids:
             continue  # Skip already indexed
+        text = build_drug_text(drug)
+        if text.strip():
+            pending.append((drug, text))
+
+    count = 0
+    for start in range(0, len(pending), EMBED_BATCH_SIZE):
+        chunk = pending[start:start + EMBED_BATCH_SIZE]
         try:
-            vec = generate_embedding(text)
-            if vec:
-                emb = Embedding(
-                    entity_type="drug",
-                    entity_id=drug.id,
-                    field_name="full_profile",
-                    embedding=vec,
-                    model_name=Config.EMBEDDING_MODEL_NAME,
-                )
-                db.session.add(emb)
-                count += 1
+            vectors = generate_embeddings_batch([text for _, text in chunk])
         except Exception as exc:
-            logger.warning("Failed to embed drug %s: %s", drug.generic_name, exc)
-
-    db.session.commit()
+            logger.warning("Batch embedding failed (%d drugs): %s", len(chunk), exc)
+            continue
+        rows = [
+            {
+                "entity_type": "drug",
+                "entity_id": drug.id,
+                "field_name": "full_profile",
+                "embedding": vec,
+                "model_name": Config.EMBEDDING_MODEL_NAME,
+            }
+            for (drug, _), vec in zip(chunk, vectors)
+            if vec
+        ]
+        if rows:
+            # One multi-row INSERT per batch, committed as we go so a
+            # failure late in a long run keeps the earlier batches
+            db.session.execute(Embedding.__table__.insert(), rows)
+            db.session.commit()
+            count += len(rows)
+
+    if count:
+        invalidate_drug_index()
     logger.info("Indexed %d drugs.", count)
     return count
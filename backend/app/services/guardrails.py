@@ -5,9 +5,12 @@ Logs all refusals for compliance review.
 """
 
 import logging
+import re
+from types import MappingProxyType
 
 from app.services.intent_classifier import (
     is_unsafe_intent,
+    UNSAFE_INTENTS,
     INTENT_DIAGNOSIS,
     INTENT_TREATMENT_REC,
     INTENT_BEST_DRUG,
@@ -149,6 +152,13 @@ DEFAULT_REFUSAL = {
     ),
 }
 
+# Frozen at import: every unsafe intent resolves with a single
+# read-only lookup — intents without a bespoke template get the default
+# baked in here instead of a .get fallback branch per refusal.
+REFUSAL_TEMPLATES = MappingProxyType(
+    {**{intent: DEFAULT_REFUSAL for intent in UNSAFE_INTENTS}, **REFUSAL_TEMPLATES}
+)
+
 
 def check_guardrails(query: str, intent: str) -> dict:
     """
@@ -157,7 +167,7 @@ def check_guardrails(query: str, intent: str) -> dict:
       { "refused": bool, "refusal_reason": str|None, "refusal_message": str|None }
     """
     if is_unsafe_intent(intent):
-        template = REFUSAL_TEMPLATES.get(intent, DEFAULT_REFUSAL)
+        template = REFUSAL_TEMPLATES[intent]
         logger.warning(
             "GUARDRAIL REFUSAL | intent=%s | reason=%s | query=%s",
             intent,
@@ -178,33 +188,38 @@ def check_guardrails(query: str, intent: str) -> dict:
     return {"refused": False, "refusal_reason": None, "refusal_message": None}
 
 
+# Attempts to override system behavior, fused into one compiled
+# alternation: the query is scanned once for every phrase instead of
+# once per phrase (the stdlib stand-in for an Aho-Corasick automaton
+# over a fixed phrase set).
+_JAILBREAK_PHRASES = (
+    "ignore your instructions",
+    "ignore previous instructions",
+    "pretend you are",
+    "act as a doctor",
+    "you are now",
+    "disregard your rules",
+    "override your",
+    "forget your guidelines",
+)
+_JAILBREAK_RE = re.compile("|".join(re.escape(p) for p in _JAILBREAK_PHRASES))
+
+_JAILBREAK_REFUSAL = {
+    "refused": True,
+    "refusal_reason": "system_integrity",
+    "refusal_message": (
+        "⚠️ **Request Declined**\n\n"
+        "I cannot modify my operational guidelines. Clerasense operates within "
+        "strict safety boundaries to ensure accurate, verified drug information.\n\n"
+        "Please ask a drug information question."
+    ),
+}
+
+
 def _content_level_checks(query: str) -> dict | None:
     """Additional content-level safety checks beyond intent classification."""
-    q_lower = query.lower()
-
-    # Check for attempts to override system behavior
-    jailbreak_phrases = [
-        "ignore your instructions",
-        "ignore previous instructions",
-        "pretend you are",
-        "act as a doctor",
-        "you are now",
-        "disregard your rules",
-        "override your",
-        "forget your guidelines",
-    ]
-    for phrase in jailbreak_phrases:
-        if phrase in q_lower:
-            logger.warning("GUARDRAIL REFUSAL | reason=jailbreak_attempt | query=%s", query[:200])
-            return {
-                "refused": True,
-                "refusal_reason": "system_integrity",
-                "refusal_message": (
-                    "⚠️ **Request Declined**\n\n"
-                    "I cannot modify my operational guidelines. Clerasense operates within "
-                    "strict safety boundaries to ensure accurate, verified drug information.\n\n"
-                    "Please ask a drug information question."
-                ),
-            }
+    if _JAILBREAK_RE.search(query.lower()):
+        logger.warning("GUARDRAIL REFUSAL | reason=jailbreak_attempt | query=%s", query[:200])
+        return dict(_JAILBREAK_REFUSAL)
 
     return None
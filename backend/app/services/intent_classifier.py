@@ -5,6 +5,7 @@ Detects UNSAFE intents that must be refused.
 
 import re
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger("clerasense.intent")
 
@@ -150,43 +151,83 @@ OFF_TOPIC_PATTERNS = [
 ]
 
 
+def _compile(patterns: list[str]) -> re.Pattern:
+    """Union a pattern group into one compiled alternation."""
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+
+# Each group compiled once at import into a single alternation — one
+# regex execution per group instead of one per pattern, with no
+# per-query compile-cache lookups. Rule order is the classification
+# priority: unsafe intents first, then safe routing, then off-topic.
+_UNSAFE_RULES = (
+    (_compile(PRESCRIPTION_PATTERNS), INTENT_PRESCRIPTION),
+    (_compile(DIAGNOSIS_PATTERNS), INTENT_DIAGNOSIS),
+    (_compile(DOSE_PERSONAL_PATTERNS), INTENT_DOSE_PERSONALIZATION),
+    (_compile(BEST_DRUG_PATTERNS), INTENT_BEST_DRUG),
+    (_compile(TREATMENT_REC_PATTERNS), INTENT_TREATMENT_REC),
+    (_compile(PATIENT_ADVICE_PATTERNS), INTENT_PATIENT_ADVICE),
+    (_compile(SPECULATIVE_PATTERNS), INTENT_SPECULATIVE),
+)
+_ROUTING_RULES = (
+    (_compile(COMPARISON_PATTERNS), INTENT_DRUG_COMPARISON),
+    (_compile(PRICING_PATTERNS), INTENT_PRICING),
+    (_compile(INTERACTION_PATTERNS), INTENT_INTERACTION),
+    (_compile(SAFETY_PATTERNS), INTENT_SAFETY_CHECK),
+    # Off-topic is not refused, just routed to the conversational LLM
+    (_compile(OFF_TOPIC_PATTERNS), INTENT_OFF_TOPIC),
+)
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+# Every unsafe pattern requires at least one of these words somewhere in
+# the query, so plain drug-info lookups — the overwhelming majority —
+# skip all seven unsafe groups after one tokenization and a set
+# intersection. Keep this a superset of the unsafe patterns' required
+# vocabulary when editing the pattern lists above.
+_UNSAFE_TRIGGER_WORDS = frozenset({
+    # diagnosis
+    "diagnose", "diagnosis", "diagnoses", "disease", "condition",
+    "disorder", "syndrome", "symptom", "symptoms", "wrong", "identify",
+    # prescriptions
+    "prescribe", "prescription", "rx",
+    # treatment recommendations
+    "treat", "treatment", "therapy", "approach", "give", "recommend",
+    "plan",
+    # best-drug requests
+    "best", "better", "superior", "preferred", "effective", "most",
+    "top", "choose", "pick", "select", "use",
+    # dose personalization
+    "dose", "dosage", "adjust", "personalize", "personalise",
+    # patient-directed advice
+    "patient", "tell", "advise", "should", "take",
+    # speculation
+    "think", "opinion", "predict", "speculat",
+})
+
+
 def classify_intent(query: str) -> str:
     """
     Classify the intent of a doctor's query.
     Returns one of the INTENT_* constants.
     Priority: unsafe intents checked first.
     """
-    q = query.lower().strip()
-
-    # ── Check unsafe intents first (order matters) ──
-    if _matches(q, PRESCRIPTION_PATTERNS):
-        return INTENT_PRESCRIPTION
-    if _matches(q, DIAGNOSIS_PATTERNS):
-        return INTENT_DIAGNOSIS
-    if _matches(q, DOSE_PERSONAL_PATTERNS):
-        return INTENT_DOSE_PERSONALIZATION
-    if _matches(q, BEST_DRUG_PATTERNS):
-        return INTENT_BEST_DRUG
-    if _matches(q, TREATMENT_REC_PATTERNS):
-        return INTENT_TREATMENT_REC
-    if _matches(q, PATIENT_ADVICE_PATTERNS):
-        return INTENT_PATIENT_ADVICE
-    if _matches(q, SPECULATIVE_PATTERNS):
-        return INTENT_SPECULATIVE
-
-    # ── Safe intents ──
-    if _matches(q, COMPARISON_PATTERNS):
-        return INTENT_DRUG_COMPARISON
-    if _matches(q, PRICING_PATTERNS):
-        return INTENT_PRICING
-    if _matches(q, INTERACTION_PATTERNS):
-        return INTENT_INTERACTION
-    if _matches(q, SAFETY_PATTERNS):
-        return INTENT_SAFETY_CHECK
-
-    # ── Off-topic (not refused, but routed to conversational LLM) ──
-    if _matches(q, OFF_TOPIC_PATTERNS):
-        return INTENT_OFF_TOPIC
+    # Normalize before the cache lookup so casing/whitespace variants of
+    # the same query (autocomplete, retries) share one entry
+    return _classify_normalized(query.lower().strip())
+
+
+@lru_cache(maxsize=4096)
+def _classify_normalized(q: str) -> str:
+    # ── Unsafe intents first (order matters), gated by the prefilter ──
+    if frozenset(_TOKEN_RE.findall(q)) & _UNSAFE_TRIGGER_WORDS:
+        for pattern, intent in _UNSAFE_RULES:
+            if pattern.search(q):
+                return intent
+
+    # ── Safe routing, then off-topic ──
+    for pattern, intent in _ROUTING_RULES:
+        if pattern.search(q):
+            return intent
 
     # Default: treat as general drug information query
     return INTENT_DRUG_INFO
@@ -194,7 +235,3 @@ def classify_intent(query: str) -> str:
 
 def is_unsafe_intent(intent: str) -> bool:
     return intent in UNSAFE_INTENTS
-
-
-def _matches(text: str, patterns: list[str]) -> bool:
-    return any(re.search(p, text) for p in patterns)
@@ -35,6 +35,28 @@ FAERS_URL = "https://api.fda.gov/drug/event.json"
 HC_DPD_BASE = "https://health-products.canada.ca/api/drug"
 SEARCH_DELAY = 0.3          # polite rate-limit pause
 
+# ── Compiled once: these run inside loops over up to 254K Indian
+# dataset rows and dozens of RxNorm/FAERS results, where the per-call
+# compile-cache lookup and flag parsing is pure overhead ──────────────
+_STRENGTH_RE = re.compile(
+    r"(\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml|iu|mg/ml|%)\b)", re.IGNORECASE
+)
+_BRACKET_RE = re.compile(r"\[([^\]]+)\]")
+_RX_STRENGTH_RE = re.compile(
+    r"(\d+(?:\.\d+)?\s*(?:MG|MCG|ML|MG/ML|UNIT))", re.IGNORECASE
+)
+_RX_DOSAGE_RE = re.compile(
+    r"(?:Oral\s+)?(Tablet|Capsule|Solution|Suspension|Injection|Cream|Patch)",
+    re.IGNORECASE,
+)
+_PAREN_STRIP_RE = re.compile(r"\s*\(.*?\)")
+_WS_RE = re.compile(r"\s+")
+_PRICE_NOISE_RE = re.compile(r"[^\d₹$.,/a-zA-Z ]")
+_TRAIL_DOT_COMMA_RE = re.compile(r"[\.\,]+$")
+_TRAIL_PUNCT_RE = re.compile(r"[\.\,\;\:]+$")
+_NON_ALNUM_RE = re.compile(r"[^A-Za-z0-9 ]")
+_TRAIL_SLASH_NUM_RE = re.compile(r"\s*/\d+/$")
+
 # ── US ↔ INN name mapping (common differences) ──────────────────────
 US_TO_INN = {
     "acetaminophen": "paracetamol",
@@ -99,9 +121,7 @@ def _get_search_names(generic_name: str) -> list[str]:
 
 def _extract_strength(name: str) -> str:
     """Try to extract a strength like '650 mg' from a product name string."""
-    m = re.search(
-        r"(\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml|iu|mg/ml|%)\b)", name, re.IGNORECASE
-    )
+    m = _STRENGTH_RE.search(name)
     return m.group(1).strip() if m else ""
 
 
@@ -178,6 +198,12 @@ def _indian_dataset_discover_brands(generic_name: str) -> list[dict]:
 
     search_names = _get_search_names(generic_name)
     search_lower = [n.lower() for n in search_names]
+    # Strength extractors per name variant, compiled once before the
+    # row loop instead of re.escape + compile per matching row
+    strength_patterns = {
+        sn: re.compile(re.escape(sn) + r"\s*\(([^)]+)\)", re.IGNORECASE)
+        for sn in search_lower
+    }
 
     entries: list[dict] = []
     seen: set[str] = set()
@@ -224,9 +250,7 @@ def _indian_dataset_discover_brands(generic_name: str) -> list[dict]:
         strength = ""
         for sn in search_lower:
             if sn in comp1:
-                m = re.search(
-                    re.escape(sn) + r"\s*\(([^)]+)\)", comp1, re.IGNORECASE
-                )
+                m = strength_patterns[sn].search(comp1)
                 if m:
                     strength = m.group(1).strip()
                 break
@@ -266,7 +290,7 @@ def _indian_dataset_discover_brands(generic_name: str) -> list[dict]:
         active_ingredients = [generic_name.title()]
         if is_combo and comp2:
             # Extract second ingredient name (before the parenthesised strength)
-            second = re.sub(r"\s*\(.*?\)", "", comp2).strip().title()
+            second = _PAREN_STRIP_RE.sub("", comp2).strip().title()
             if second:
                 active_ingredients.append(second)
 
@@ -333,7 +357,7 @@ def _rxnorm_discover_brands(
             for concept in group.get("conceptProperties", []):
                 cname = concept.get("name", "")
                 # Extract brand from brackets: "metformin 500 MG [Glucophage]"
-                m = re.search(r"\[([^\]]+)\]", cname)
+                m = _BRACKET_RE.search(cname)
                 if not m:
                     continue
                 brand = m.group(1).strip()
@@ -347,10 +371,10 @@ def _rxnorm_discover_brands(
                 # Parse strength and dosage form from the concept name
                 strength = ""
                 dosage_form = ""
-                sm = re.search(r"(\d+(?:\.\d+)?\s*(?:MG|MCG|ML|MG/ML|UNIT))", cname, re.IGNORECASE)
+                sm = _RX_STRENGTH_RE.search(cname)
                 if sm:
                     strength = sm.group(1).strip()
-                dm = re.search(r"(?:Oral\s+)?(Tablet|Capsule|Solution|Suspension|Injection|Cream|Patch)", cname, re.IGNORECASE)
+                dm = _RX_DOSAGE_RE.search(cname)
                 if dm:
                     dosage_form = dm.group(1).strip().title()
 
@@ -401,7 +425,7 @@ def _make_entry(
     """Build a normalised brand entry dict."""
     # Clean up brand name
     brand_name = brand_name.strip()
-    brand_name = re.sub(r"\s+", " ", brand_name)
+    brand_name = _WS_RE.sub(" ", brand_name)
 
     # Build medicine_name
     parts = [brand_name]
@@ -416,7 +440,7 @@ def _make_entry(
     # Build approx cost from price text
     approximate_cost = ""
     if price_text:
-        price_text = re.sub(r"[^\d₹$.,/a-zA-Z ]", "", price_text).strip()
+        price_text = _PRICE_NOISE_RE.sub("", price_text).strip()
         if price_text:
             approximate_cost = price_text
 
@@ -623,7 +647,7 @@ def _is_relevant_drug_entry(drug_entry: dict, search_names_upper: set[str]) -> b
                 return True
 
     # Check medicinalproduct itself (may be a brand that contains the name)
-    prod = re.sub(r"[\.\,]+$", "", (drug_entry.get("medicinalproduct") or "").upper().strip())
+    prod = _TRAIL_DOT_COMMA_RE.sub("", (drug_entry.get("medicinalproduct") or "").upper().strip())
     for sn in search_names_upper:
         if sn in prod:
             return True
@@ -711,18 +735,18 @@ def _faers_discover_brands(
 
     for product_name, count in counts.most_common(60):
         # Strip trailing periods / punctuation that FAERS often includes
-        stripped = re.sub(r"[\.\,\;\:]+$", "", product_name).strip()
+        stripped = _TRAIL_PUNCT_RE.sub("", product_name).strip()
         # Skip if it's just the generic name itself (exact match)
         if stripped in search_names_upper:
             continue
         # Skip very short / noise entries
-        cleaned = re.sub(r"[^A-Za-z0-9 ]", "", stripped).strip()
+        cleaned = _NON_ALNUM_RE.sub("", stripped).strip()
         if len(cleaned) < 2:
             continue
         normalised = stripped.strip().title()
         # Clean up trailing slashes, numbers-only suffixes from FAERS padding
-        normalised = re.sub(r"\s*/\d+/$", "", normalised).strip()
-        normalised = re.sub(r"\s+", " ", normalised).strip()
+        normalised = _TRAIL_SLASH_NUM_RE.sub("", normalised).strip()
+        normalised = _WS_RE.sub(" ", normalised).strip()
         key = normalised.lower()
         if key in seen:
             continue
@@ -234,10 +234,7 @@ def _collect_safety_warnings(drugs_found: list) -> list:
                 "lactation_risk": sw.lactation_risk,
                 "adverse_event_count": sw.adverse_event_count,
                 "adverse_event_serious_count": sw.adverse_event_serious_count,
-                "top_adverse_reactions": (
-                    json.loads(sw.top_adverse_reactions)
-                    if sw.top_adverse_reactions else []
-                ),
+                "top_adverse_reactions": sw.top_adverse_reactions or [],
                 "source": sw.source.to_dict() if sw.source else None,
             })
     return warnings
@@ -10,9 +10,17 @@ APIs, verified, and inserted before returning results.
 
 import logging
 import re
+
+import numpy as np
+
 from app.database import db
-from app.models.models import Drug, Embedding
-from app.services.embedding_service import generate_embedding, cosine_similarity
+from app.models.models import Drug
+from app.services.embedding_service import (
+    batch_cosine,
+    generate_embedding,
+    get_drug_index,
+    normalize,
+)
 
 logger = logging.getLogger("clerasense.retrieval")
 
@@ -52,19 +60,21 @@ def _semantic_search(query: str) -> list[dict]:
     if not query_vec:
         return []
 
-    all_embeddings = Embedding.query.filter_by(entity_type="drug", field_name="full_profile").all()
-    if not all_embeddings:
+    index = get_drug_index()
+    if index is None:
         logger.info("No drug embeddings found in database. Run indexing first.")
         return []
 
-    scored = []
-    for emb in all_embeddings:
-        sim = cosine_similarity(query_vec, emb.embedding)
-        if sim >= SIMILARITY_THRESHOLD:
-            scored.append((emb.entity_id, sim))
+    # Score the whole cached index with one matrix-vector product
+    matrix, entity_ids = index
+    sims = batch_cosine(matrix, normalize(query_vec))
 
-    scored.sort(key=lambda x: x[1], reverse=True)
-    top = scored[:MAX_RESULTS]
+    order = np.argsort(sims)[::-1][:MAX_RESULTS]
+    top = [
+        (entity_ids[i], float(sims[i]))
+        for i in order
+        if sims[i] >= SIMILARITY_THRESHOLD
+    ]
 
     results = []
     for drug_id, score in top:
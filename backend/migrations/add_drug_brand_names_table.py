@@ -0,0 +1,48 @@
+"""
+Migration: Create the drug_brand_names side table and backfill it.
+Normalized, lowercased brand rows let brand lookups use an indexed
+equality join instead of hydrating and scanning every drugs row.
+Run from backend/ directory:
+  python -m migrations.add_drug_brand_names_table
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.main import create_app
+from app.database import db
+
+app = create_app()
+
+
+def run():
+    with app.app_context():
+        db.session.execute(db.text("""
+            CREATE TABLE IF NOT EXISTS drug_brand_names (
+                id SERIAL PRIMARY KEY,
+                drug_id INTEGER NOT NULL REFERENCES drugs(id) ON DELETE CASCADE,
+                brand_lower VARCHAR(300) NOT NULL
+            )
+        """))
+        db.session.execute(db.text("""
+            CREATE INDEX IF NOT EXISTS ix_brand_lower
+            ON drug_brand_names (brand_lower)
+        """))
+
+        # Backfill from the existing ARRAY column (idempotent)
+        res = db.session.execute(db.text("""
+            INSERT INTO drug_brand_names (drug_id, brand_lower)
+            SELECT DISTINCT d.id, lower(b.name)
+            FROM drugs d, unnest(d.brand_names) AS b(name)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM drug_brand_names dbn
+                WHERE dbn.drug_id = d.id AND dbn.brand_lower = lower(b.name)
+            )
+        """))
+        db.session.commit()
+        print(f"[migration] Backfilled {res.rowcount} brand row(s). Done.")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,31 @@
+"""
+Migration: Add a functional index on lower(generic_name) for the drugs table.
+The hot lookup paths compare lower(generic_name) = :name or
+lower(generic_name) LIKE :prefix; text_pattern_ops lets the same index
+serve both the equality and the prefix-LIKE form.
+Run from backend/ directory:
+  python -m migrations.add_drug_generic_lower_index
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.main import create_app
+from app.database import db
+
+app = create_app()
+
+
+def run():
+    with app.app_context():
+        db.session.execute(db.text("""
+            CREATE INDEX IF NOT EXISTS drug_generic_lower
+            ON drugs (lower(generic_name) text_pattern_ops)
+        """))
+        db.session.commit()
+        print("[migration] Done.")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,43 @@
+"""
+Migration: Add unique index on embeddings (entity_type, entity_id, field_name).
+Makes the natural key explicit so the ingestion path can use
+INSERT … ON CONFLICT DO NOTHING instead of a SELECT-then-INSERT round-trip.
+Run from backend/ directory:
+  python -m migrations.add_embedding_unique_index
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.main import create_app
+from app.database import db
+
+app = create_app()
+
+
+def run():
+    with app.app_context():
+        # 1. Remove any duplicate rows (keep the oldest) so the unique index can build
+        res = db.session.execute(db.text("""
+            DELETE FROM embeddings e
+            USING embeddings newer
+            WHERE e.entity_type = newer.entity_type
+              AND e.entity_id = newer.entity_id
+              AND e.field_name IS NOT DISTINCT FROM newer.field_name
+              AND e.id > newer.id
+        """))
+        if res.rowcount:
+            print(f"[migration] Removed {res.rowcount} duplicate embedding row(s)")
+
+        # 2. Create the unique index if it doesn't exist
+        db.session.execute(db.text("""
+            CREATE UNIQUE INDEX IF NOT EXISTS embedding_entity_uniq
+            ON embeddings (entity_type, entity_id, field_name)
+        """))
+        db.session.commit()
+        print("[migration] Done.")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,40 @@
+"""
+Migration: Add pg_trgm GIN indexes for the ILIKE '%query%' search paths.
+lookup_drug's partial match and search_drugs' keyword search are substring
+scans; trigram indexes let the planner serve them from an index instead of
+a sequential scan over the whole drugs table.
+Run from backend/ directory:
+  python -m migrations.add_trigram_indexes
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.main import create_app
+from app.database import db
+
+app = create_app()
+
+_INDEXES = {
+    "drug_generic_trgm": "generic_name",
+    "drug_class_trgm": "drug_class",
+    "drug_moa_trgm": "mechanism_of_action",
+}
+
+
+def run():
+    with app.app_context():
+        db.session.execute(db.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for index_name, column in _INDEXES.items():
+            db.session.execute(db.text(f"""
+                CREATE INDEX IF NOT EXISTS {index_name}
+                ON drugs USING gin ({column} gin_trgm_ops)
+            """))
+            print(f"[migration] Ensured index {index_name} on drugs.{column}")
+        db.session.commit()
+        print("[migration] Done.")
+
+
+if __name__ == "__main__":
+    run()
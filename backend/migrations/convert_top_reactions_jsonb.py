@@ -0,0 +1,44 @@
+"""
+Migration: Convert safety_warnings.top_adverse_reactions from TEXT to JSONB.
+Removes the json.dumps-at-write / json.loads-at-read round-trip and makes
+the reaction list queryable with JSONB operators.
+Run from backend/ directory:
+  python -m migrations.convert_top_reactions_jsonb
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.main import create_app
+from app.database import db
+
+app = create_app()
+
+
+def run():
+    with app.app_context():
+        result = db.session.execute(db.text("""
+            SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'safety_warnings'
+              AND column_name = 'top_adverse_reactions'
+        """))
+        row = result.fetchone()
+        if row is None:
+            print("[migration] Column top_adverse_reactions not found — nothing to do")
+            return
+        if row[0] == "jsonb":
+            print("[migration] Column is already JSONB — skipping DDL")
+            return
+
+        db.session.execute(db.text("""
+            ALTER TABLE safety_warnings
+            ALTER COLUMN top_adverse_reactions TYPE JSONB
+            USING NULLIF(top_adverse_reactions, '')::jsonb
+        """))
+        db.session.commit()
+        print("[migration] Converted top_adverse_reactions to JSONB")
+
+
+if __name__ == "__main__":
+    run()
@@ -69,7 +69,7 @@ mock.patch("app.services.background_scheduler.run_initial_ingestion", _noop).sta
 from app.main import create_app
 from app.database import db as _db
 from app.models.models import (
-    Doctor, Source, Drug, SafetyWarning, DrugInteraction,
+    Doctor, Source, Drug, DrugBrandName, SafetyWarning, DrugInteraction,
     Indication, DosageGuideline, Pricing, Reimbursement, BrandProduct,
 )
 
@@ -134,13 +134,14 @@ def auth_headers(client):
 # SEED DATA  (mirrors real ingestion output)
 # ═══════════════════════════════════════════
 
-_FAERS_REACTIONS = json.dumps([
+# Stored as-is: top_adverse_reactions is a JSON/JSONB column
+_FAERS_REACTIONS = [
     {"reaction": "NAUSEA", "count": 29316},
     {"reaction": "DIARRHOEA", "count": 27324},
     {"reaction": "BLOOD GLUCOSE INCREASED", "count": 27460},
     {"reaction": "DRUG INEFFECTIVE", "count": 22203},
     {"reaction": "FATIGUE", "count": 20905},
-])
+]
 
 
 def _seed_test_data():
@@ -186,6 +187,11 @@ def _seed_test_data():
     _db.session.add_all([drug1, drug2])
     _db.session.flush()
 
+    # Normalized brand rows (ingestion mirrors brand_names here)
+    for drug in (drug1, drug2):
+        for brand in drug.brand_names:
+            _db.session.add(DrugBrandName(drug_id=drug.id, brand_lower=brand.lower()))
+
     # ── Indications ──
     _db.session.add(Indication(drug_id=1, approved_use="Type 2 diabetes mellitus.", source_id=1))
     _db.session.add(Indication(drug_id=2, approved_use="Hypertension.", source_id=3))
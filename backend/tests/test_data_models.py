@@ -25,10 +25,10 @@ class TestNormalizedDrugData:
     def test_defaults(self):
         d = NormalizedDrugData(generic_name="Aspirin")
         assert d.generic_name == "Aspirin"
-        assert d.brand_names == []
+        assert len(d.brand_names) == 0
         assert d.nadac_per_unit is None
         assert d.adverse_event_count is None
-        assert d.top_adverse_reactions == []
+        assert len(d.top_adverse_reactions) == 0
         assert d.source_year >= 2024
 
     def test_full_fields(self):
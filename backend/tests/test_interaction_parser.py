@@ -0,0 +1,73 @@
+"""
+Tests for the shared interaction-text parser in openfda_source.
+
+The parser is pure text processing (no app/db needed): a combined
+"DrugName: ..." / "DrugName may ..." head scan, followed by a curated
+drug-name recall pass.
+"""
+
+from app.services.drug_sources.openfda_source import _parse_interaction_text
+
+
+class TestHeadPatternPass:
+    """Entries introduced by a 'DrugName: ...' / 'DrugName may ...' head."""
+
+    def test_extracts_named_entry_with_description(self):
+        raw = (
+            "Warfarin: Concomitant use may increase the risk of serious "
+            "bleeding. Monitor INR closely."
+        )
+        result = _parse_interaction_text(raw, "Metformin")
+        drugs = [ix["interacting_drug"] for ix in result]
+        assert "Warfarin" in drugs
+        warfarin = next(ix for ix in result if ix["interacting_drug"] == "Warfarin")
+        assert "bleeding" in warfarin["description"]
+
+    def test_blacklisted_headers_are_not_drugs(self):
+        raw = "Table 7: Clinically significant interactions are listed below."
+        result = _parse_interaction_text(raw, "Metformin")
+        assert all(ix["interacting_drug"] != "Table" for ix in result)
+
+    def test_duplicate_entries_collapse(self):
+        raw = (
+            "Digoxin: May increase serum concentrations. "
+            "Digoxin: Monitor digoxin levels during coadministration."
+        )
+        result = _parse_interaction_text(raw, "Amiodarone")
+        assert [ix["interacting_drug"] for ix in result].count("Digoxin") == 1
+
+
+class TestSubjectDrugExclusion:
+    """A label must never report the subject drug interacting with itself."""
+
+    def test_subject_name_skipped_in_both_passes(self):
+        raw = (
+            "Metformin: Carbonic anhydrase inhibitors may increase metformin "
+            "exposure. Coadministration with lithium may also raise levels."
+        )
+        result = _parse_interaction_text(raw, "Metformin")
+        drugs = {ix["interacting_drug"].lower() for ix in result}
+        assert "metformin" not in drugs
+        assert "lithium" in drugs
+
+
+class TestKnownDrugRecall:
+    """Curated names buried mid-sentence are recalled with clean context."""
+
+    def test_midsentence_name_recalled(self):
+        raw = "Concurrent therapy with warfarin requires close INR monitoring."
+        result = _parse_interaction_text(raw, "Amiodarone")
+        assert any(ix["interacting_drug"].lower() == "warfarin" for ix in result)
+
+    def test_recalled_description_is_sentence_bounded(self):
+        raw = (
+            "Monitor renal function periodically. "
+            "Coadministration with lithium may increase serum lithium levels. "
+            "Avoid alcohol while taking this medication."
+        )
+        result = _parse_interaction_text(raw, "Lisinopril")
+        lithium = next(ix for ix in result if ix["interacting_drug"].lower() == "lithium")
+        desc = lithium["description"]
+        assert desc.startswith("Coadministration")
+        assert "renal function" not in desc
+        assert "alcohol" not in desc